@@ -0,0 +1,47 @@
+"""ANN index on embeddings.vector (HNSW by default, IVFFlat optional)
+
+Index type and build parameters come from settings (VECTOR_INDEX, HNSW_M,
+HNSW_EF_CONSTRUCTION, IVFFLAT_LISTS). IVFFlat learns its lists from existing rows,
+so build it after the table has data (downgrade and re-upgrade this revision to rebuild).
+
+Revision ID: 20261017_000003
+Revises: 20250902_000002
+Create Date: 2026-10-17 00:00:03.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from packages.common.config import get_settings
+
+
+revision: str = "20261017_000003"
+down_revision: Union[str, None] = "20250902_000002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    settings = get_settings()
+    kind = settings.vector_index.lower()
+    if kind == "hnsw":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_vector_hnsw ON embeddings "
+            "USING hnsw (vector vector_cosine_ops) "
+            f"WITH (m = {int(settings.hnsw_m)}, ef_construction = {int(settings.hnsw_ef_construction)})"
+        )
+    elif kind == "ivfflat":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_vector_ivfflat ON embeddings "
+            f"USING ivfflat (vector vector_cosine_ops) WITH (lists = {int(settings.ivfflat_lists)})"
+        )
+    elif kind != "none":
+        raise ValueError(f"unsupported VECTOR_INDEX: {settings.vector_index}")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_embeddings_vector_ivfflat")
+    op.execute("DROP INDEX IF EXISTS ix_embeddings_vector_hnsw")
@@ -0,0 +1,90 @@
+"""latest-version pointer on documents and denormalized scope columns
+
+Adds documents.latest_version_id plus user_id/document_id/is_latest on chunks and
+embeddings (embeddings also carry document_version_id), so user-scoped retrieval is a
+single-table filtered nearest-neighbour scan instead of a four-way join with a
+correlated max(version) subquery.
+
+Revision ID: 20261017_000004
+Revises: 20261017_000003
+Create Date: 2026-10-17 00:00:04.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_000004"
+down_revision: Union[str, None] = "20261017_000003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("latest_version_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_documents_latest_version",
+        "documents",
+        "document_versions",
+        ["latest_version_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+    for table in ("chunks", "embeddings"):
+        op.add_column(table, sa.Column("user_id", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("document_id", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("is_latest", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column("embeddings", sa.Column("document_version_id", sa.Integer(), nullable=True))
+
+    # Backfill: latest = highest version id per document (previous query semantics)
+    op.execute(
+        """
+        UPDATE documents d
+        SET latest_version_id = (SELECT max(dv.id) FROM document_versions dv WHERE dv.document_id = d.id)
+        """
+    )
+    op.execute(
+        """
+        UPDATE chunks c
+        SET user_id = d.user_id, document_id = d.id, is_latest = (d.latest_version_id = dv.id)
+        FROM document_versions dv
+        JOIN documents d ON d.id = dv.document_id
+        WHERE dv.id = c.document_version_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE embeddings e
+        SET user_id = c.user_id, document_id = c.document_id,
+            document_version_id = c.document_version_id, is_latest = c.is_latest
+        FROM chunks c
+        WHERE c.id = e.chunk_id
+        """
+    )
+
+    for table in ("chunks", "embeddings"):
+        op.alter_column(table, "user_id", nullable=False)
+        op.alter_column(table, "document_id", nullable=False)
+    op.alter_column("embeddings", "document_version_id", nullable=False)
+
+    op.create_index("ix_chunks_user_latest", "chunks", ["user_id", "document_id"], postgresql_where=sa.text("is_latest"))
+    op.create_index("ix_embeddings_user_latest", "embeddings", ["user_id", "document_id"], postgresql_where=sa.text("is_latest"))
+    op.create_index("ix_embeddings_docver", "embeddings", ["document_version_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_embeddings_docver", table_name="embeddings")
+    op.drop_index("ix_embeddings_user_latest", table_name="embeddings")
+    op.drop_index("ix_chunks_user_latest", table_name="chunks")
+    op.drop_column("embeddings", "document_version_id")
+    for table in ("embeddings", "chunks"):
+        op.drop_column(table, "is_latest")
+        op.drop_column(table, "document_id")
+        op.drop_column(table, "user_id")
+    op.drop_constraint("fk_documents_latest_version", "documents", type_="foreignkey")
+    op.drop_column("documents", "latest_version_id")
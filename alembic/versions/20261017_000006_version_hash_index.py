@@ -0,0 +1,26 @@
+"""index document_versions.content_sha256 for cross-document dedup lookups
+
+Revision ID: 20261017_000006
+Revises: 20261017_000005
+Create Date: 2026-10-17 00:00:06.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20261017_000006"
+down_revision: Union[str, None] = "20261017_000005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_document_versions_content_sha256", "document_versions", ["content_sha256"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_versions_content_sha256", table_name="document_versions")
@@ -0,0 +1,29 @@
+"""per-page content hash for incremental re-ingestion
+
+Revision ID: 20261017_000007
+Revises: 20261017_000006
+Create Date: 2026-10-17 00:00:07.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_000007"
+down_revision: Union[str, None] = "20261017_000006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("pages", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    # same digest as apps.api.db.versions.page_hash: sha256 of the UTF-8 page text
+    op.execute("UPDATE pages SET content_hash = encode(sha256(convert_to(text, 'UTF8')), 'hex')")
+
+
+def downgrade() -> None:
+    op.drop_column("pages", "content_hash")
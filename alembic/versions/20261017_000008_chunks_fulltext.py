@@ -0,0 +1,32 @@
+"""generated tsvector + GIN index on chunks for hybrid retrieval
+
+Revision ID: 20261017_000008
+Revises: 20261017_000007
+Create Date: 2026-10-17 00:00:08.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20261017_000008"
+down_revision: Union[str, None] = "20261017_000007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # STORED generated column: computed on insert (COPY included), rewrites existing rows once
+    op.execute(
+        "ALTER TABLE chunks ADD COLUMN tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED"
+    )
+    op.create_index("ix_chunks_tsv", "chunks", ["tsv"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_tsv", table_name="chunks")
+    op.drop_column("chunks", "tsv")
@@ -0,0 +1,55 @@
+"""normalized course codes on documents (GIN-indexed) for query scoping
+
+Revision ID: 20261017_000009
+Revises: 20261017_000008
+Create Date: 2026-10-17 00:00:09.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from packages.parsers.course_codes import extract_course_codes
+
+
+revision: str = "20261017_000009"
+down_revision: Union[str, None] = "20261017_000008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "documents",
+        sa.Column(
+            "course_codes",
+            postgresql.ARRAY(sa.String(length=32)),
+            nullable=False,
+            server_default=sa.text("'{}'::varchar[]"),
+        ),
+    )
+    # backfill with the same extractor the API uses at notify time
+    conn = op.get_bind()
+    docs = sa.table("documents", sa.column("id", sa.Integer), sa.column("title", sa.String))
+    updates = [
+        {"doc_id": doc_id, "codes": codes}
+        for doc_id, title in conn.execute(sa.select(docs.c.id, docs.c.title))
+        if (codes := extract_course_codes(title))
+    ]
+    if updates:
+        conn.execute(
+            sa.text("UPDATE documents SET course_codes = :codes WHERE id = :doc_id").bindparams(
+                sa.bindparam("codes", type_=postgresql.ARRAY(sa.String(length=32)))
+            ),
+            updates,
+        )
+    op.create_index("ix_documents_course_codes", "documents", ["course_codes"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_course_codes", table_name="documents")
+    op.drop_column("documents", "course_codes")
@@ -0,0 +1,28 @@
+"""page thumbnails and text layers rendered at ingest
+
+Revision ID: 20261017_000010
+Revises: 20261017_000009
+Create Date: 2026-10-17 00:00:10.000000
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_000010"
+down_revision: Union[str, None] = "20261017_000009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing versions stay NULL (no assets) until re-ingested
+    op.add_column("document_versions", sa.Column("assets_prefix", sa.String(length=1024), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document_versions", "assets_prefix")
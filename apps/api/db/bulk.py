@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import io
+import struct
+from typing import IO, Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from pgvector.utils import Vector
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from apps.api.db.vector import vector_text
+
+
+PAGE_COLUMNS = ("document_version_id", "page_number", "text", "content_hash")
+CHUNK_COLUMNS = (
+    "id",
+    "document_version_id",
+    "page_number",
+    "text",
+    "start_offset",
+    "end_offset",
+    "user_id",
+    "document_id",
+)
+EMBEDDING_COLUMNS = ("chunk_id", "model", "dim", "vector", "user_id", "document_id", "document_version_id")
+EVENT_COLUMNS = ("document_version_id", "title", "due_at", "page_number", "created_at")
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_field(value: Any) -> str:
+    # COPY text format: \N is NULL, backslash/tab/newline/CR are escaped
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(_COPY_ESCAPES)
+
+
+# COPY BINARY framing: signature, flags, header extension length / end-of-data marker
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+_PGCOPY_NULL = struct.pack(">i", -1)
+
+
+def _int4(value: Any) -> bytes:
+    return struct.pack(">i", value)
+
+
+def _utf8(value: Any) -> bytes:
+    return str(value).encode("utf-8")
+
+
+# column -> encoder producing the type's binary send format (vector: dim, unused, float4[])
+EMBEDDING_BINARY_ENCODERS: Dict[str, Callable[[Any], bytes]] = {
+    "chunk_id": _int4,
+    "model": _utf8,
+    "dim": _int4,
+    "vector": Vector._to_db_binary,
+    "user_id": _int4,
+    "document_id": _int4,
+    "document_version_id": _int4,
+}
+
+
+def encode_copy_binary(
+    columns: Sequence[str], rows: Iterable[Mapping[str, Any]], encoders: Mapping[str, Callable[[Any], bytes]]
+) -> Tuple[io.BytesIO, int]:
+    """Serialize rows into a COPY BINARY stream. Returns (buffer positioned at 0, row count)."""
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    field_count = struct.pack(">h", len(columns))
+    count = 0
+    for row in rows:
+        buf.write(field_count)
+        for c in columns:
+            value = row[c]
+            if value is None:
+                buf.write(_PGCOPY_NULL)
+                continue
+            data = encoders[c](value)
+            buf.write(struct.pack(">i", len(data)))
+            buf.write(data)
+        count += 1
+    buf.write(_PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf, count
+
+
+def copy_rows_binary(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Mapping[str, Any]],
+    encoders: Mapping[str, Callable[[Any], bytes]],
+) -> int:
+    """Like copy_rows, but in COPY BINARY format: no text rendering or server-side parsing.
+
+    Every column needs an encoder matching its exact Postgres type (int4 is not int8).
+    """
+    buf, count = encode_copy_binary(columns, rows, encoders)
+    if not count:
+        return 0
+    _copy_expert(db, f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)", buf)
+    return count
+
+
+def _copy_expert(db: Session, sql: str, buf: IO[Any]) -> None:
+    """Run a psycopg2 COPY ... FROM STDIN on the session's connection (its transaction)."""
+    # the DBAPI cursor protocol has no context manager; close explicitly
+    cur = db.connection().connection.cursor()
+    try:
+        cur.copy_expert(sql, buf)
+    finally:
+        cur.close()
+
+
+def encode_copy_text(columns: Sequence[str], rows: Iterable[Mapping[str, Any]]) -> Tuple[io.StringIO, int]:
+    """Serialize rows into a COPY text stream. Returns (buffer positioned at 0, row count)."""
+    buf = io.StringIO()
+    count = 0
+    for row in rows:
+        fields = [_copy_field(vector_text(row[c]) if c == "vector" else row[c]) for c in columns]
+        buf.write("\t".join(fields))
+        buf.write("\n")
+        count += 1
+    buf.seek(0)
+    return buf, count
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], rows: Iterable[Mapping[str, Any]]) -> int:
+    """Stream `rows` into `table` with a single `COPY ... FROM STDIN` on the session's connection.
+
+    Runs inside the session transaction (caller commits).
+    """
+    buf, count = encode_copy_text(columns, rows)
+    if not count:
+        return 0
+    _copy_expert(db, f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+    return count
+
+
+def bulk_insert_pages(db: Session, rows: Iterable[Mapping[str, Any]]) -> int:
+    """COPY page rows (keys: PAGE_COLUMNS)."""
+    return copy_rows(db, "pages", PAGE_COLUMNS, rows)
+
+
+def bulk_insert_chunks(db: Session, rows: Sequence[Mapping[str, Any]]) -> List[int]:
+    """COPY chunk rows (keys: CHUNK_COLUMNS minus id) and return their ids in input order.
+
+    COPY cannot return generated keys, so ids are reserved from the serial sequence first.
+    """
+    if not rows:
+        return []
+    ids = list(
+        db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('chunks', 'id')) FROM generate_series(1, :n)"),
+            {"n": len(rows)},
+        ).scalars()
+    )
+    copy_rows(db, "chunks", CHUNK_COLUMNS, ({**row, "id": cid} for row, cid in zip(rows, ids)))
+    return ids
+
+
+def bulk_insert_events(db: Session, rows: Iterable[Mapping[str, Any]]) -> int:
+    """COPY event rows (keys: EVENT_COLUMNS; datetimes should be timezone-aware)."""
+    return copy_rows(db, "events", EVENT_COLUMNS, rows)
+
+
+def bulk_upsert_embeddings(db: Session, rows: Iterable[Mapping[str, Any]]) -> int:
+    """Upsert embedding rows (keys: EMBEDDING_COLUMNS) on (chunk_id, model).
+
+    Rows are COPYed into a session-local staging table, then merged with one
+    INSERT ... ON CONFLICT. Vectors travel in pgvector's binary format. `is_latest` is
+    left to promote_latest_version.
+    """
+    db.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS _stage_embeddings "
+            "(LIKE embeddings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+    )
+    db.execute(text("TRUNCATE _stage_embeddings"))
+    count = copy_rows_binary(db, "_stage_embeddings", EMBEDDING_COLUMNS, rows, EMBEDDING_BINARY_ENCODERS)
+    if not count:
+        return 0
+    cols = ", ".join(EMBEDDING_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in EMBEDDING_COLUMNS if c not in ("chunk_id", "model"))
+    db.execute(
+        text(
+            f"INSERT INTO embeddings ({cols}) SELECT {cols} FROM _stage_embeddings "
+            f"ON CONFLICT (chunk_id, model) DO UPDATE SET {updates}"
+        )
+    )
+    return count
@@ -3,8 +3,10 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, String, Text
-from sqlalchemy.dialects.postgresql import JSONB
+import numpy as np
+from sqlalchemy import BigInteger, Boolean, Computed, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from pgvector.sqlalchemy import Vector
 
@@ -30,9 +32,23 @@ class Document(Base):
     title: Mapped[str] = mapped_column(String(512), nullable=False)
     storage_uri: Mapped[str] = mapped_column(String(1024), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    # maintained by promote_latest_version once a version is fully indexed
+    latest_version_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("document_versions.id", ondelete="SET NULL", use_alter=True, name="fk_documents_latest_version"),
+        nullable=True,
+    )
+
+    # normalized codes parsed from the title ("CS101"); GIN-indexed for query scoping
+    course_codes: Mapped[list[str]] = mapped_column(
+        ARRAY(String(32)), default=list, server_default=sql_text("'{}'::varchar[]"), nullable=False
+    )
 
     user: Mapped[User] = relationship(back_populates="documents")
-    versions: Mapped[list[DocumentVersion]] = relationship(back_populates="document", cascade="all, delete-orphan")  # type: ignore[name-defined]
+    versions: Mapped[list[DocumentVersion]] = relationship(  # type: ignore[name-defined]
+        back_populates="document", cascade="all, delete-orphan", foreign_keys="DocumentVersion.document_id"
+    )
+
+    __table_args__ = (Index("ix_documents_course_codes", "course_codes", postgresql_using="gin"),)
 
 
 class DocumentVersion(Base):
@@ -42,9 +58,11 @@ class DocumentVersion(Base):
     document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     content_sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
     pages: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # s3://bucket/.../pages/ holding NNNN.jpg thumbnails and NNNN.json text layers (None: not rendered)
+    assets_prefix: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
 
-    document: Mapped[Document] = relationship(back_populates="versions")
+    document: Mapped[Document] = relationship(back_populates="versions", foreign_keys=[document_id])
     pages_rel: Mapped[list[Page]] = relationship(back_populates="document_version", cascade="all, delete-orphan")  # type: ignore[name-defined]
     chunks: Mapped[list[Chunk]] = relationship(back_populates="document_version", cascade="all, delete-orphan")  # type: ignore[name-defined]
 
@@ -61,6 +79,8 @@ class Page(Base):
     page_number: Mapped[int] = mapped_column(Integer, nullable=False)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     bbox_meta: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # sha256 of `text`; unchanged pages are carried over between versions
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     document_version: Mapped[DocumentVersion] = relationship(back_populates="pages_rel")
 
@@ -78,11 +98,19 @@ class Chunk(Base):
     text: Mapped[str] = mapped_column(Text, nullable=False)
     start_offset: Mapped[int] = mapped_column(Integer, nullable=False)
     end_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    # denormalized scope for filtered retrieval
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    document_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_latest: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false", nullable=False)
+    # lexical retrieval; maintained by Postgres (the config must match the query side)
+    tsv: Mapped[Optional[str]] = mapped_column(TSVECTOR, Computed("to_tsvector('english', text)", persisted=True))
 
     document_version: Mapped[DocumentVersion] = relationship(back_populates="chunks")
 
     __table_args__ = (
         Index("ix_chunks_docver_page", "document_version_id", "page_number"),
+        Index("ix_chunks_user_latest", "user_id", "document_id", postgresql_where=sql_text("is_latest")),
+        Index("ix_chunks_tsv", "tsv", postgresql_using="gin"),
     )
 
 
@@ -92,10 +120,32 @@ class Embedding(Base):
     chunk_id: Mapped[int] = mapped_column(ForeignKey("chunks.id", ondelete="CASCADE"), primary_key=True)
     model: Mapped[str] = mapped_column(String(128), primary_key=True)
     dim: Mapped[int] = mapped_column(Integer, nullable=False)
-    vector: Mapped[list[float]] = mapped_column(Vector(1536))
+    vector: Mapped[np.ndarray] = mapped_column(Vector(1536))
+    # denormalized scope (copied from the chunk) so ANN scans filter on this table alone
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    document_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    document_version_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_latest: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false", nullable=False)
 
     # backref if needed via relationship from Chunk
 
+    __table_args__ = (
+        Index("ix_embeddings_user_latest", "user_id", "document_id", postgresql_where=sql_text("is_latest")),
+        Index("ix_embeddings_docver", "document_version_id"),
+    )
+
+
+class EmbeddingCache(Base):
+    """Provider vectors keyed by sha256(provider, model, text); shared across versions and documents."""
+
+    __tablename__ = "embedding_cache"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(128), nullable=False)
+    dim: Mapped[int] = mapped_column(Integer, nullable=False)
+    vector: Mapped[np.ndarray] = mapped_column(Vector(1536), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
 
 class Event(Base):
     __tablename__ = "events"
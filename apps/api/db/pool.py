@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from packages.common.config import AppSettings
+
+
+def pool_options(settings: AppSettings) -> Dict[str, Any]:
+    """create_engine() pool arguments for this process's SERVICE_ROLE (api|worker)."""
+    worker = settings.service_role.lower() == "worker"
+    return {
+        "pool_size": settings.worker_db_pool_size if worker else settings.api_db_pool_size,
+        "max_overflow": settings.worker_db_max_overflow if worker else settings.api_db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+class CheckoutStats:
+    """Checkout counters for one pool: how long callers waited for a connection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_mean": (self.wait_seconds_total / attempts * 1000) if attempts else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+
+class _TimedCheckout:
+    # times Pool.connect(): queue wait, plus connect/pre-ping when a new or stale
+    # connection is involved
+    def connect(self) -> Any:
+        stats: CheckoutStats = self.__dict__.setdefault("checkout_stats", CheckoutStats())
+        start = time.perf_counter()
+        try:
+            conn = super().connect()  # type: ignore[misc]
+        except exc.TimeoutError:
+            stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.record(time.perf_counter() - start)
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that records checkout wait times (see pool_status)."""
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times (see pool_status)."""
+
+
+def pool_status(engine: Optional[Engine]) -> Optional[dict]:
+    """Live occupancy and checkout-wait stats of an engine's pool (None if not created yet).
+
+    Counters belong to the current pool object, so they restart when the engine is disposed.
+    """
+    if engine is None:
+        return None
+    pool: Pool = engine.pool
+    out: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            {
+                "size": pool.size(),
+                # negative while fewer than pool_size connections have been opened
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+            }
+        )
+    stats = pool.__dict__.get("checkout_stats")
+    if stats is not None:
+        out.update(stats.as_dict())
+    return out
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
-from typing import Generator, Iterator
-from contextlib import contextmanager
+from typing import AsyncIterator, Generator, Iterator, Optional
+from contextlib import asynccontextmanager, contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from apps.api.db.pool import TimedAsyncQueuePool, TimedQueuePool, pool_options
 from packages.common.config import get_settings
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url.unicode_string(), pool_pre_ping=True)
+engine = create_engine(settings.database_url.unicode_string(), poolclass=TimedQueuePool, **pool_options(settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -37,3 +40,61 @@ def db_session() -> Iterator:
         db.close()
 
 
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def async_database_url() -> str:
+    """POSTGRES_DSN with the driver swapped for asyncpg (same host, database and credentials)."""
+    url = make_url(settings.database_url.unicode_string()).set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        # libpq spelling; asyncpg takes `ssl`
+        sslmode = url.normalized_query["sslmode"][-1]
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url.render_as_string(hide_password=False)
+
+
+def _register_vector(dbapi_connection, connection_record) -> None:
+    # pgvector's asyncpg codec: vectors travel in the binary format and come back as ndarrays
+    from pgvector.asyncpg import register_vector
+
+    dbapi_connection.run_async(register_vector)
+
+
+def current_async_engine() -> Optional[AsyncEngine]:
+    """The async engine if a request has created it, without creating one."""
+    return _async_engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Process-wide asyncpg engine, created on first use (workers never import asyncpg)."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(), poolclass=TimedAsyncQueuePool, **pool_options(settings)
+        )
+        event.listen(_async_engine.sync_engine, "connect", _register_vector)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+
+@asynccontextmanager
+async def async_db_session() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of db_session() for `async def` routes.
+
+    Example:
+        async with async_db_session() as db:
+            rows = (await db.execute(select(Document))).scalars().all()
+    """
+    get_async_engine()
+    assert _AsyncSessionLocal is not None
+    async with _AsyncSessionLocal() as db:
+        yield db
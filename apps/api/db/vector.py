@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import BindParameter, TextClause
+
+from packages.common.config import get_settings
+
+
+_EXTVERSION = text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+# database URL -> whether its pgvector knows hnsw.iterative_scan; probed once per process
+_iterative_scan_support: Dict[str, bool] = {}
+
+
+def _wants_iterative_scan() -> bool:
+    value = get_settings().hnsw_iterative_scan
+    return bool(value) and value.lower() != "off"
+
+
+def _supports_iterative_scan(extversion: Optional[str]) -> bool:
+    # pgvector reserves the hnsw.* prefix, so setting a knob it does not know (< 0.8) is an error
+    try:
+        return extversion is not None and tuple(int(p) for p in extversion.split(".")[:2]) >= (0, 8)
+    except ValueError:
+        return False
+
+
+def _search_params_stmt(
+    ef_search: Optional[int], probes: Optional[int], iterative_scan: bool
+) -> Tuple[TextClause, Dict[str, str]]:
+    settings = get_settings()
+    params: dict[str, object] = {
+        "hnsw.ef_search": ef_search if ef_search is not None else settings.hnsw_ef_search,
+        "ivfflat.probes": probes if probes is not None else settings.ivfflat_probes,
+    }
+    if iterative_scan:
+        params["hnsw.iterative_scan"] = settings.hnsw_iterative_scan
+    # one round trip for all knobs
+    calls = ", ".join(f"set_config(:n{i}, :v{i}, true)" for i in range(len(params)))
+    binds: dict[str, str] = {}
+    for i, (name, value) in enumerate(params.items()):
+        binds[f"n{i}"] = name
+        binds[f"v{i}"] = str(value)
+    return text(f"SELECT {calls}"), binds
+
+
+def apply_search_params(db: Session, ef_search: Optional[int] = None, probes: Optional[int] = None) -> None:
+    """Set pgvector ANN search knobs for the current transaction.
+
+    `hnsw.ef_search` bounds the HNSW candidate list and `ivfflat.probes` the number of
+    IVF lists visited; both trade recall for latency. An HNSW scan returns at most
+    ef_search rows, and rows failing the WHERE clause are dropped after the scan, so
+    filtered queries also need `hnsw.iterative_scan` (HNSW_ITERATIVE_SCAN) to keep scanning
+    until LIMIT is met; it is only sent when the server's pgvector (>= 0.8) supports it,
+    checked once per database. Values default to settings and are
+    transaction-local (`set_config(..., true)`), so pooled connections are left untouched.
+    Call inside the same session/transaction as the similarity query.
+    """
+    iterative_scan = False
+    if _wants_iterative_scan():
+        key = str(db.get_bind().engine.url)
+        if key not in _iterative_scan_support:
+            _iterative_scan_support[key] = _supports_iterative_scan(db.execute(_EXTVERSION).scalar())
+        iterative_scan = _iterative_scan_support[key]
+    db.execute(*_search_params_stmt(ef_search, probes, iterative_scan))
+
+
+async def apply_search_params_async(
+    db: AsyncSession, ef_search: Optional[int] = None, probes: Optional[int] = None
+) -> None:
+    """apply_search_params() for an AsyncSession."""
+    iterative_scan = False
+    if _wants_iterative_scan():
+        key = str(db.get_bind().engine.url)
+        if key not in _iterative_scan_support:
+            _iterative_scan_support[key] = _supports_iterative_scan((await db.execute(_EXTVERSION)).scalar())
+        iterative_scan = _iterative_scan_support[key]
+    await db.execute(*_search_params_stmt(ef_search, probes, iterative_scan))
+
+
+@lru_cache(maxsize=8)
+def _text_format(dim: int) -> str:
+    # 9 significant digits round-trip any float32 exactly
+    return "[" + ",".join(["%.9g"] * dim) + "]"
+
+
+def vector_text(value: Any) -> Optional[str]:
+    """Render a vector as a pgvector text literal, ~2x faster and ~40% shorter than str(float)."""
+    if value is None:
+        return None
+    values = np.asarray(value, dtype=np.float32).tolist()
+    return _text_format(len(values)) % tuple(values)
+
+
+def _float32(value: Any) -> Optional[np.ndarray]:
+    return None if value is None else np.asarray(value, dtype=np.float32)
+
+
+class _QueryVector(Vector):
+    # psycopg2 interpolates parameters client-side as text, so a binary send format is
+    # not available there; render the compact literal instead. On asyncpg the codec
+    # registered by apps.api.db.session sends the array in pgvector's binary format.
+    cache_ok = True
+
+    def bind_processor(self, dialect: Any) -> Any:
+        if dialect.driver == "asyncpg":
+            return _float32
+        return vector_text
+
+
+def vector_param(name: str = "embedding") -> BindParameter:
+    """Typed bind for a query vector in raw `text()` SQL; accepts float32 arrays or lists."""
+    return bindparam(name, type_=_QueryVector())
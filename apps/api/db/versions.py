@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Mapping, Optional, Sequence, cast
+
+from sqlalchemy import text
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from packages.common.config import get_settings
+
+
+def _execute_count(db: Session, stmt: TextClause, params: Mapping[str, Any]) -> int:
+    """Run a DML statement and return the number of rows it touched."""
+    # DML through Session.execute() returns a CursorResult; the annotation says Result
+    return cast(CursorResult, db.execute(stmt, params)).rowcount
+
+
+def promote_latest_version(db: Session, document_id: int, version_id: int) -> bool:
+    """Make `version_id` the latest version of `document_id`.
+
+    Updates `documents.latest_version_id` and flips the denormalized `is_latest` flag on
+    chunk and embedding rows of the document. A version older than the current pointer is
+    never promoted (late-finishing jobs cannot regress the pointer). Returns True when the
+    pointer moved or already pointed at `version_id`. Caller commits.
+
+    Call once the version is complete, also when it has no chunks (no extractable text):
+    the document then answers nothing rather than from the version it replaced.
+    """
+    moved = _execute_count(
+        db,
+        text(
+            """
+            UPDATE documents SET latest_version_id = :vid
+            WHERE id = :did AND (latest_version_id IS NULL OR latest_version_id <= :vid)
+            """
+        ),
+        {"did": document_id, "vid": version_id},
+    )
+    if not moved:
+        return False
+    for table in ("chunks", "embeddings"):
+        db.execute(
+            text(
+                f"""
+                UPDATE {table} SET is_latest = (document_version_id = :vid)
+                WHERE document_id = :did AND is_latest IS DISTINCT FROM (document_version_id = :vid)
+                """
+            ),
+            {"did": document_id, "vid": version_id},
+        )
+    return True
+
+
+_LATEST_VERSIONS_SQL = text(
+    """
+    SELECT latest_version_id FROM documents
+    WHERE user_id = :uid AND latest_version_id IS NOT NULL
+      AND (:use_ids = 0 OR id = ANY(:ids))
+    ORDER BY latest_version_id
+    """
+)
+
+
+def _latest_params(user_id: int, document_ids: Optional[Sequence[int]]) -> Dict[str, object]:
+    ids = list(document_ids or [])
+    return {"uid": user_id, "use_ids": 1 if ids else 0, "ids": ids}
+
+
+def latest_version_ids(db: Session, user_id: int, document_ids: Optional[Sequence[int]] = None) -> List[int]:
+    """Latest indexed version of each of the user's documents (optionally only `document_ids`)."""
+    return list(db.execute(_LATEST_VERSIONS_SQL, _latest_params(user_id, document_ids)).scalars())
+
+
+async def latest_version_ids_async(
+    db: AsyncSession, user_id: int, document_ids: Optional[Sequence[int]] = None
+) -> List[int]:
+    """latest_version_ids() for an AsyncSession."""
+    result = await db.execute(_LATEST_VERSIONS_SQL, _latest_params(user_id, document_ids))
+    return list(result.scalars())
+
+
+_EMBEDDING_COUNTS_SQL = text(
+    """
+    SELECT document_version_id, count(*) FROM embeddings
+    WHERE document_version_id = ANY(:vids) AND model = :model
+    GROUP BY document_version_id
+    """
+)
+
+
+async def embedding_counts_async(db: AsyncSession, version_ids: Sequence[int]) -> Dict[int, int]:
+    """Embeddings stored under EMBEDDING_MODEL per version; versions without any are left out."""
+    result = await db.execute(
+        _EMBEDDING_COUNTS_SQL, {"vids": list(version_ids), "model": get_settings().embedding_model}
+    )
+    return {vid: n for vid, n in result}
+
+
+def page_hash(page_text: str) -> str:
+    """Digest stored in `pages.content_hash` (sha256 of the UTF-8 text)."""
+    return hashlib.sha256(page_text.encode("utf-8")).hexdigest()
+
+
+def previous_version_id(db: Session, document_id: int, version_id: int) -> Optional[int]:
+    """The document's current latest version, unless that is `version_id` itself."""
+    prev = db.execute(
+        text("SELECT latest_version_id FROM documents WHERE id = :did"), {"did": document_id}
+    ).scalar()
+    return prev if prev is not None and prev != version_id else None
+
+
+def page_hashes(db: Session, version_id: int) -> Dict[str, int]:
+    """Map page content hash -> page number for a version (first page wins on repeats)."""
+    rows = db.execute(
+        text(
+            """
+            SELECT content_hash, page_number FROM pages
+            WHERE document_version_id = :vid AND content_hash IS NOT NULL
+            ORDER BY page_number DESC
+            """
+        ),
+        {"vid": version_id},
+    )
+    return {h: p for h, p in rows}
+
+
+def find_reusable_version(db: Session, content_sha256: str, exclude_version_id: int) -> Optional[int]:
+    """Latest version (any document) with identical content indexed under EMBEDDING_MODEL, or None."""
+    return db.execute(
+        text(
+            """
+            SELECT dv.id FROM document_versions dv
+            WHERE dv.content_sha256 = :sha AND dv.id <> :vid AND dv.pages > 0
+              AND EXISTS (
+                SELECT 1 FROM embeddings e WHERE e.document_version_id = dv.id AND e.model = :model
+              )
+            ORDER BY dv.id DESC
+            LIMIT 1
+            """
+        ),
+        {"sha": content_sha256, "vid": exclude_version_id, "model": get_settings().embedding_model},
+    ).scalar()
+
+
+def copy_version_rows(
+    db: Session,
+    src_version_id: int,
+    dst_version_id: int,
+    page_map: Optional[Mapping[int, int]] = None,
+    include_pages: bool = True,
+) -> Dict[str, int]:
+    """Copy derived rows (pages, chunks, embeddings, events) from one version to another.
+
+    `page_map` maps destination page numbers to source page numbers and restricts the copy
+    to those pages (a source page may feed several destination pages); by default every
+    source page is copied to the same number. Rows are
+    re-scoped to the destination document/user with `is_latest` false (promote afterwards).
+    Destination rows already on the mapped pages are replaced, so retrying after a partial
+    copy does not duplicate them. Everything runs server-side with INSERT ... SELECT;
+    caller commits.
+    """
+    if page_map is None:
+        src_pages = list(
+            db.execute(
+                text("SELECT page_number FROM pages WHERE document_version_id = :src"), {"src": src_version_id}
+            ).scalars()
+        )
+        page_map = {p: p for p in src_pages}
+    if not page_map:
+        return {"pages": 0, "chunks": 0, "embeddings": 0, "events": 0}
+    scope = db.execute(
+        text(
+            """
+            SELECT d.id AS document_id, d.user_id FROM document_versions dv
+            JOIN documents d ON d.id = dv.document_id WHERE dv.id = :dst
+            """
+        ),
+        {"dst": dst_version_id},
+    ).one()
+    params = {
+        "src": src_version_id,
+        "dst": dst_version_id,
+        "src_pages": list(page_map.values()),
+        "dst_pages": list(page_map.keys()),
+        "document_id": scope.document_id,
+        "user_id": scope.user_id,
+    }
+    mapping = "unnest(CAST(:src_pages AS int[]), CAST(:dst_pages AS int[])) AS m(src_page, dst_page)"
+    # chunks and events have no natural key to upsert on; embeddings go with their chunks
+    for table in ("events", "chunks") + (("pages",) if include_pages else ()):
+        db.execute(
+            text(f"DELETE FROM {table} WHERE document_version_id = :dst AND page_number = ANY(:dst_pages)"), params
+        )
+    counts = {"pages": 0}
+    if include_pages:
+        counts["pages"] = _execute_count(
+            db,
+            text(
+                f"""
+                INSERT INTO pages (document_version_id, page_number, text, bbox_meta, content_hash)
+                SELECT :dst, m.dst_page, p.text, p.bbox_meta, p.content_hash
+                FROM pages p JOIN {mapping} ON m.src_page = p.page_number
+                WHERE p.document_version_id = :src
+                """
+            ),
+            params,
+        )
+    counts["chunks"] = _execute_count(
+        db,
+        text(
+            f"""
+            INSERT INTO chunks (document_version_id, page_number, text, start_offset, end_offset, user_id, document_id, is_latest)
+            SELECT :dst, m.dst_page, c.text, c.start_offset, c.end_offset, :user_id, :document_id, false
+            FROM chunks c JOIN {mapping} ON m.src_page = c.page_number
+            WHERE c.document_version_id = :src
+            """
+        ),
+        params,
+    )
+    # chunks are unique per (version, page, offsets), which pairs old and new rows
+    counts["embeddings"] = _execute_count(
+        db,
+        text(
+            f"""
+            INSERT INTO embeddings (chunk_id, model, dim, vector, user_id, document_id, document_version_id, is_latest)
+            SELECT nc.id, e.model, e.dim, e.vector, :user_id, :document_id, :dst, false
+            FROM chunks oc
+            JOIN {mapping} ON m.src_page = oc.page_number
+            JOIN embeddings e ON e.chunk_id = oc.id
+            JOIN chunks nc ON nc.document_version_id = :dst AND nc.page_number = m.dst_page
+                AND nc.start_offset = oc.start_offset AND nc.end_offset = oc.end_offset
+            WHERE oc.document_version_id = :src
+            """
+        ),
+        params,
+    )
+    counts["events"] = _execute_count(
+        db,
+        text(
+            f"""
+            INSERT INTO events (document_version_id, title, due_at, page_number, source_start_offset, source_end_offset, created_at)
+            SELECT :dst, ev.title, ev.due_at, m.dst_page, ev.source_start_offset, ev.source_end_offset, now()
+            FROM events ev JOIN {mapping} ON m.src_page = ev.page_number
+            WHERE ev.document_version_id = :src
+            """
+        ),
+        params,
+    )
+    return counts
@@ -3,12 +3,12 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Generator
 
-import boto3
 from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 
 from apps.api.db.session import get_db_session
 from packages.common.config import get_settings
+from packages.common.storage import get_s3_client
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -25,16 +25,4 @@ async def get_redis() -> AsyncGenerator[Redis, None]:
 
 
 def get_s3():
-    settings = get_settings()
-    session = boto3.session.Session()
-    s3_client = session.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        aws_access_key_id=settings.s3_access_key,
-        aws_secret_access_key=settings.s3_secret_key,
-        region_name=settings.s3_region,
-        use_ssl=settings.s3_secure,
-    )
-    return s3_client
-
-
+    return get_s3_client()
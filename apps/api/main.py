@@ -4,9 +4,12 @@ import logging
 
 from fastapi import FastAPI
 
+from apps.api.db.session import dispose_async_engine
 from apps.api.routers import health, uploads, qa, calendar, documents
 from packages.common.config import get_settings
 from packages.common.logging import setup_json_logging
+from packages.common.storage import ensure_bucket
+from packages.rag.llm import close_async_client
 
 
 def create_app() -> FastAPI:
@@ -21,6 +24,13 @@ def create_app() -> FastAPI:
     app.include_router(calendar.router)
     app.include_router(documents.router)
 
+    # bucket check once per process instead of on every presign
+    app.add_event_handler("startup", ensure_bucket)
+
+    # pooled LLM client and async DB engine are created lazily; release their connections on shutdown
+    app.add_event_handler("shutdown", close_async_client)
+    app.add_event_handler("shutdown", dispose_async_engine)
+
     logging.getLogger(__name__).info("api_started", extra={"environment": settings.environment})
     return app
 
@@ -1,49 +1,69 @@
 from __future__ import annotations
 
-from datetime import datetime
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 
-from apps.api.db.session import db_session
-from apps.api.db.models import Event
+from apps.api.db.session import async_db_session
+from apps.api.db.models import User
+from apps.api.services.calendar import (
+    ICS_FOOTER,
+    ICS_HEADER,
+    EventSetKey,
+    etag_for,
+    etag_matches,
+    events_block,
+    latest_version_keys,
+    version_key,
+)
 
 
 router = APIRouter(prefix="/calendar", tags=["calendar"]) 
 
+# calendar clients poll: let them keep the body and revalidate with If-None-Match each time
+_CACHE_HEADERS = {"Cache-Control": "private, no-cache"}
 
-def _ics_escape(text: str) -> str:
-    return text.replace(",", "\, ").replace(";", "\; ")
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **_CACHE_HEADERS})
 
 
 @router.get("/ics")
-def get_ics(document_version_id: int) -> Response:
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//SyllabusSync//EN",
-    ]
-    with db_session() as db:
-        events = (
-            db.query(Event)
-            .filter(Event.document_version_id == document_version_id)
-            .order_by(Event.due_at)
-            .all()
-        )
-        for ev in events:
-            dt = ev.due_at.strftime("%Y%m%dT%H%M%SZ")
-            lines.extend(
-                [
-                    "BEGIN:VEVENT",
-                    f"UID:ev-{ev.id}@syllabussync",
-                    f"DTSTAMP:{dt}",
-                    f"DTSTART:{dt}",
-                    f"SUMMARY:{_ics_escape(ev.title)}",
-                    "END:VEVENT",
-                ]
-            )
-    lines.append("END:VCALENDAR")
-    ics = "\r\n".join(lines)
-    return Response(content=ics, media_type="text/calendar")
+async def get_ics(document_version_id: int, if_none_match: Optional[str] = Header(default=None)) -> Response:
+    async with async_db_session() as db:
+        key = await version_key(db, document_version_id)
+        etag = etag_for([key])
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+        block = await events_block(db, key)
+    ics = ICS_HEADER + block + ICS_FOOTER
+    return Response(content=ics, media_type="text/calendar", headers={"ETag": etag, **_CACHE_HEADERS})
+
+
+@router.get("/feed.ics")
+async def get_feed(if_none_match: Optional[str] = Header(default=None)) -> Response:
+    """One calendar with the events of the latest version of every document (MVP: dev user).
+
+    The ETag covers every version's event set; the body is streamed version by version,
+    reusing the per-version blocks cached by /calendar/ics.
+    """
+    keys: List[EventSetKey] = []
+    async with async_db_session() as db:
+        user = (await db.execute(select(User).where(User.email == "dev@local"))).scalar_one_or_none()
+        if user is not None:
+            keys = await latest_version_keys(db, user.id)
+    etag = etag_for(keys)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
 
+    async def body() -> AsyncIterator[str]:
+        yield ICS_HEADER + "X-WR-CALNAME:SyllabusSync\r\n"
+        if keys:
+            async with async_db_session() as db:
+                for key in keys:
+                    yield await events_block(db, key)
+        yield ICS_FOOTER
 
+    return StreamingResponse(body(), media_type="text/calendar", headers={"ETag": etag, **_CACHE_HEADERS})
@@ -1,46 +1,102 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
-from sqlalchemy.orm import Session
+from typing import Optional
 
-from apps.api.db.session import db_session
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy import delete, select
+
+from apps.api.db.session import async_db_session
 from apps.api.db.models import Document, DocumentVersion, User
+from apps.api.services.objects import object_response
+from packages.common.storage import page_asset_uri
 
 
 router = APIRouter(prefix="/documents", tags=["documents"]) 
 
 
 @router.get("")
-def list_documents() -> list[dict]:
-    with db_session() as db:
-        docs = db.query(Document).order_by(Document.id.desc()).all()
+async def list_documents() -> list[dict]:
+    async with async_db_session() as db:
+        docs = (await db.execute(select(Document).order_by(Document.id.desc()))).scalars().all()
         return [
-            {"id": d.id, "title": d.title, "storage_uri": d.storage_uri, "created_at": d.created_at.isoformat()}
+            {
+                "id": d.id,
+                "title": d.title,
+                "storage_uri": d.storage_uri,
+                "latest_version_id": d.latest_version_id,
+                "course_codes": d.course_codes,
+                "created_at": d.created_at.isoformat(),
+            }
             for d in docs
         ]
 
 
 @router.get("/{doc_id}/versions")
-def list_versions(doc_id: int) -> list[dict]:
-    with db_session() as db:
-        vers = db.query(DocumentVersion).filter(DocumentVersion.document_id == doc_id).order_by(DocumentVersion.id).all()
+async def list_versions(doc_id: int) -> list[dict]:
+    async with async_db_session() as db:
+        vers = (
+            await db.execute(
+                select(DocumentVersion).where(DocumentVersion.document_id == doc_id).order_by(DocumentVersion.id)
+            )
+        ).scalars().all()
         return [
-            {"id": v.id, "pages": v.pages, "created_at": v.created_at.isoformat()}
+            {
+                "id": v.id,
+                "pages": v.pages,
+                "page_assets": v.assets_prefix is not None,
+                "created_at": v.created_at.isoformat(),
+            }
             for v in vers
         ]
 
 
 @router.post("/reset")
-def reset_documents(purge_storage: bool = False) -> dict:
+async def reset_documents(purge_storage: bool = False) -> dict:
     # MVP: default dev user only
     deleted = 0
-    with db_session() as db:
-        user = db.query(User).filter(User.email == "dev@local").one_or_none()
+    async with async_db_session() as db:
+        user = (await db.execute(select(User).where(User.email == "dev@local"))).scalar_one_or_none()
         if not user:
             return {"deleted": 0}
         # Optional: best-effort S3 deletion could be added here
-        deleted = db.query(Document).filter(Document.user_id == user.id).delete(synchronize_session=False)
-        db.commit()
+        result = await db.execute(
+            delete(Document).where(Document.user_id == user.id).execution_options(synchronize_session=False)
+        )
+        deleted = result.rowcount
+        await db.commit()
     return {"deleted": int(deleted)}
 
 
+async def _page_asset(
+    version_id: int, page_number: int, kind: str, media_type: str, if_none_match: Optional[str]
+) -> Response:
+    async with async_db_session() as db:
+        ver = await db.get(DocumentVersion, version_id)
+    if ver is None or ver.assets_prefix is None or not 1 <= page_number <= ver.pages:
+        raise HTTPException(status_code=404, detail="page_asset_not_found")
+    # assets never change for a version: cache for good, revalidate by ETag
+    return await run_in_threadpool(
+        object_response,
+        page_asset_uri(ver.assets_prefix, page_number, kind),
+        media_type,
+        if_none_match=if_none_match,
+        cache_control="private, max-age=31536000, immutable",
+    )
+
+
+@router.get("/versions/{version_id}/pages/{page_number}/thumbnail")
+async def page_thumbnail(
+    version_id: int, page_number: int, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """Low-resolution JPEG of one page, rendered at ingest."""
+    return await _page_asset(version_id, page_number, "jpg", "image/jpeg", if_none_match)
+
+
+@router.get("/versions/{version_id}/pages/{page_number}/text")
+async def page_text_layer(
+    version_id: int, page_number: int, if_none_match: Optional[str] = Header(default=None)
+) -> Response:
+    """Word boxes of one page (fractions of the page size) for overlaying a thumbnail."""
+    return await _page_asset(version_id, page_number, "json", "application/json", if_none_match)
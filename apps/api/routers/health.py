@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from fastapi import APIRouter
+from apps.api.db.pool import pool_status
+from apps.api.db.session import current_async_engine, engine
 from apps.api.schemas.health import HealthStatus
+from packages.common.config import get_settings
 
 router = APIRouter(prefix="/health", tags=["health"]) 
 
@@ -16,3 +19,12 @@ def ready() -> HealthStatus:
     return HealthStatus(status="ready")
 
 
+@router.get("/pool")
+def pool() -> dict:
+    """DB pool occupancy and checkout waits for this process (async engine: null until first use)."""
+    async_engine = current_async_engine()
+    return {
+        "role": get_settings().service_role,
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine if async_engine is not None else None),
+    }
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from apps.api.schemas.uploads import (
@@ -10,10 +13,12 @@ from apps.api.schemas.uploads import (
     PresignRequest,
     PresignResponse,
 )
+from apps.api.services.objects import object_response
 from apps.api.services.uploads import create_presigned_post
 from apps.api.db.models import Document, DocumentVersion, User
 from apps.api.db.session import db_session
 from apps.worker.jobs.ingest import parse_pdf
+from packages.parsers.course_codes import extract_course_codes
 
 
 router = APIRouter(prefix="/files", tags=["files"]) 
@@ -35,12 +40,21 @@ def notify(body: NotifyUploadRequest) -> NotifyUploadResponse:
             db.add(default_user)
             db.flush()
 
-        doc = Document(user_id=default_user.id, title=body.title, storage_uri=body.storage_uri)
-        db.add(doc)
+        if body.document_id is not None:
+            doc = db.get(Document, body.document_id)
+            if doc is None or doc.user_id != default_user.id:
+                raise HTTPException(status_code=404, detail="document_not_found")
+            doc.title = body.title
+            doc.storage_uri = body.storage_uri
+        else:
+            doc = Document(user_id=default_user.id, title=body.title, storage_uri=body.storage_uri)
+            db.add(doc)
+        doc.course_codes = extract_course_codes(body.title)
         db.flush()
         doc_id = doc.id
 
-        ver = DocumentVersion(document_id=doc_id, content_sha256="pending", pages=0)
+        # placeholder must be unique per document; parse_pdf replaces it with the real sha256
+        ver = DocumentVersion(document_id=doc_id, content_sha256=f"pending-{uuid.uuid4().hex}", pages=0)
         db.add(ver)
         db.flush()
         ver_id = ver.id
@@ -52,33 +66,18 @@ def notify(body: NotifyUploadRequest) -> NotifyUploadResponse:
 
 
 # Preview: proxy the PDF bytes so the browser can render without direct MinIO access
-import re
-import io
-import boto3
-from packages.common.config import get_settings
-
-
-def _download_s3(storage_uri: str) -> bytes:
-    settings = get_settings()
-    m = re.match(r"s3://([^/]+)/(.+)", storage_uri)
-    if not m:
-        raise ValueError("invalid storage_uri")
-    bucket, key = m.groups()
-    s3 = boto3.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        aws_access_key_id=settings.s3_access_key,
-        aws_secret_access_key=settings.s3_secret_key,
-        region_name=settings.s3_region,
-        use_ssl=settings.s3_secure,
-    )
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    return obj["Body"].read()
-
-
 @router.get("/preview")
-def preview(storage_uri: str) -> StreamingResponse:
-    data = _download_s3(storage_uri)
-    return StreamingResponse(io.BytesIO(data), media_type="application/pdf")
-
-
+def preview(
+    storage_uri: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_none_match: Optional[str] = Header(default=None),
+    if_modified_since: Optional[str] = Header(default=None),
+) -> Response:
+    # streamed straight from S3: first bytes go out immediately and PDF viewers can fetch ranges
+    return object_response(
+        storage_uri,
+        "application/pdf",
+        range_header=range_header,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
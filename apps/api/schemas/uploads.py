@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -17,6 +19,9 @@ class PresignResponse(BaseModel):
 class NotifyUploadRequest(BaseModel):
     title: str
     storage_uri: str
+    document_id: Optional[int] = Field(
+        None, description="Existing document to add a new version to; unchanged pages are reused"
+    )
 
 
 class NotifyUploadResponse(BaseModel):
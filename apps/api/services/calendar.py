@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.db.models import Document, Event
+from packages.common.cache import TTLLRUCache
+from packages.common.config import get_settings
+
+
+# bump when the rendered VEVENT text changes, so cached blocks and client ETags roll over
+ICS_FORMAT = 1
+
+ICS_HEADER = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//SyllabusSync//EN\r\n"
+ICS_FOOTER = "END:VCALENDAR"
+
+
+class EventSetKey(NamedTuple):
+    """Identity of a version's event set.
+
+    Events are only ever inserted or deleted as a set (never updated), so the row count
+    and highest id change whenever the set does.
+    """
+
+    version_id: int
+    n_events: int
+    max_id: int
+
+    def cache_key(self) -> str:
+        return f"{ICS_FORMAT}:{self.version_id}:{self.n_events}:{self.max_id}"
+
+
+def _ics_escape(text: str) -> str:
+    return text.replace(",", "\\, ").replace(";", "\\; ")
+
+
+def render_events(events: Iterable[Event]) -> str:
+    """VEVENT lines for `events`, CRLF-terminated ('' for none)."""
+    lines: List[str] = []
+    for ev in events:
+        dt = ev.due_at.strftime("%Y%m%dT%H%M%SZ")
+        lines.extend(
+            [
+                "BEGIN:VEVENT",
+                f"UID:ev-{ev.id}@syllabussync",
+                f"DTSTAMP:{dt}",
+                f"DTSTART:{dt}",
+                f"SUMMARY:{_ics_escape(ev.title)}",
+                "END:VEVENT",
+            ]
+        )
+    return "".join(line + "\r\n" for line in lines)
+
+
+def etag_for(keys: Sequence[EventSetKey]) -> str:
+    raw = ";".join(k.cache_key() for k in keys)
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, `*` and comma-separated lists)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@lru_cache
+def get_ics_cache() -> TTLLRUCache[str]:
+    """Rendered VEVENT blocks keyed by EventSetKey (a changed event set is a new key)."""
+    settings = get_settings()
+    return TTLLRUCache(settings.ics_cache_max_entries, settings.ics_cache_ttl_seconds)
+
+
+async def version_key(db: AsyncSession, version_id: int) -> EventSetKey:
+    n_events, max_id = (
+        await db.execute(
+            select(func.count(Event.id), func.coalesce(func.max(Event.id), 0)).where(
+                Event.document_version_id == version_id
+            )
+        )
+    ).one()
+    return EventSetKey(version_id, n_events, max_id)
+
+
+async def latest_version_keys(db: AsyncSession, user_id: int) -> List[EventSetKey]:
+    """EventSetKey of the latest version of each of the user's documents, in one query."""
+    rows = await db.execute(
+        select(Document.latest_version_id, func.count(Event.id), func.coalesce(func.max(Event.id), 0))
+        .outerjoin(Event, Event.document_version_id == Document.latest_version_id)
+        .where(Document.user_id == user_id, Document.latest_version_id.is_not(None))
+        .group_by(Document.latest_version_id)
+        .order_by(Document.latest_version_id)
+    )
+    return [EventSetKey(*row) for row in rows]
+
+
+async def events_block(db: AsyncSession, key: EventSetKey) -> str:
+    """Rendered VEVENTs of one version, from the cache when its event set is unchanged."""
+    cache = get_ics_cache()
+    block = cache.get(key.cache_key())
+    if block is None:
+        events = (
+            await db.execute(
+                select(Event).where(Event.document_version_id == key.version_id).order_by(Event.due_at, Event.id)
+            )
+        ).scalars()
+        block = render_events(events)
+        cache.set(key.cache_key(), block)
+    return block
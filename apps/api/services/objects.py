@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterator, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from packages.common.config import get_settings
+from packages.common.storage import get_s3_client, parse_storage_uri
+
+
+# one range only; multi-range requests get the full object (allowed by RFC 9110)
+_SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _iter_body(body: Any, chunk_bytes: int) -> Iterator[bytes]:
+    try:
+        yield from body.iter_chunks(chunk_bytes)
+    finally:
+        body.close()
+
+
+def _validators(meta: Dict[str, Any]) -> Dict[str, str]:
+    headers = {}
+    if meta.get("ETag"):
+        headers["ETag"] = meta["ETag"]
+    if meta.get("LastModified"):
+        headers["Last-Modified"] = format_datetime(meta["LastModified"], usegmt=True)
+    return headers
+
+
+def object_response(
+    storage_uri: str,
+    media_type: str,
+    *,
+    range_header: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+    cache_control: str = "private, max-age=3600",
+) -> Response:
+    """Proxy an S3 object to the client without buffering it.
+
+    The body is relayed in STORAGE_CHUNK_BYTES chunks as S3 sends it. A single `Range` is
+    forwarded to S3 and answered with 206, and `ETag`/`Last-Modified` are passed through.
+    Conditional headers are evaluated by S3, so a matching `If-None-Match` (or an unchanged
+    `If-Modified-Since`) returns 304 with no body.
+    """
+    try:
+        bucket, key = parse_storage_uri(storage_uri)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_storage_uri")
+    params: Dict[str, Any] = {"Bucket": bucket, "Key": key}
+    if range_header and _SINGLE_RANGE.match(range_header.strip()) and range_header.strip() != "bytes=-":
+        params["Range"] = range_header.strip()
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    elif if_modified_since:
+        # If-None-Match takes precedence when both are sent; malformed dates are ignored
+        try:
+            params["IfModifiedSince"] = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+
+    s3 = get_s3_client()
+    try:
+        obj = s3.get_object(**params)
+    except ClientError as exc:
+        error = exc.response.get("Error", {})
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if status == 304 or error.get("Code") in ("304", "NotModified"):
+            # If-None-Match may list several tags or be `*`: send the object's own validator
+            sent = exc.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            etag = sent.get("etag") or s3.head_object(Bucket=bucket, Key=key).get("ETag")
+            headers = {"Cache-Control": cache_control}
+            if etag:
+                headers["ETag"] = etag
+            return Response(status_code=304, headers=headers)
+        if status == 416 or error.get("Code") == "InvalidRange":
+            size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        if status == 404 or error.get("Code") in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=404, detail="object_not_found")
+        raise
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "Content-Length": str(obj["ContentLength"]),
+        **_validators(obj),
+    }
+    status_code = 200
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = obj["ContentRange"]
+        status_code = 206
+    chunk_bytes = get_settings().storage_chunk_bytes
+    # sync iterator: Starlette pulls it in the threadpool, so blocking reads stay off the loop
+    return StreamingResponse(
+        _iter_body(obj["Body"], chunk_bytes), status_code=status_code, media_type=media_type, headers=headers
+    )
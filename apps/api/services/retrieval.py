@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pgvector.utils import Vector
+from sqlalchemy import text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.db.vector import apply_search_params_async, vector_param
+from packages.common.config import get_settings
+
+
+# must match the generated chunks.tsv column (migration 20261017_000008)
+TS_CONFIG = "english"
+
+
+def _scope(alias: str, by_version: bool) -> str:
+    # chunks and embeddings carry the same denormalized scope columns
+    if by_version:
+        return f"{alias}.document_version_id = ANY(:version_ids)"
+    return f"{alias}.user_id = :user_id AND {alias}.is_latest AND (:use_ids = 0 OR {alias}.document_id = ANY(:ids))"
+
+
+def _search_sql(by_version: bool, lexical: bool, per_doc_cap: bool, with_vectors: bool = False) -> str:
+    # only vectors of the configured model are comparable with the query embedding
+    model = "e.model = :model"
+    if by_version:
+        # exact scan: a version is a few hundred rows, found via ix_embeddings_docver. Through
+        # the ANN index, near-identical vectors carried over into other versions would fill
+        # the candidate list and be filtered out afterwards (see apply_search_params).
+        source = f"""(
+                    SELECT chunk_id, vector FROM embeddings e WHERE {_scope("e", by_version)} AND {model} OFFSET 0
+                ) e"""
+    else:
+        source = f"embeddings e WHERE {_scope('e', by_version)} AND {model}"
+    arms = [
+        f"""
+        dense AS (
+            SELECT chunk_id, row_number() OVER (ORDER BY dist) AS rnk
+            FROM (
+                SELECT e.chunk_id, e.vector <=> (SELECT v FROM q) AS dist
+                FROM {source}
+                ORDER BY e.vector <=> (SELECT v FROM q)
+                LIMIT :candidates
+            ) d
+        )"""
+    ]
+    ranks = "SELECT chunk_id, rnk FROM dense"
+    if lexical:
+        # OR the query terms: the GIN index finds any-term matches, ts_rank_cd orders them
+        arms.append(
+            f"""
+        lexical AS (
+            SELECT chunk_id, row_number() OVER (ORDER BY rank DESC, chunk_id) AS rnk
+            FROM (
+                SELECT c.id AS chunk_id, ts_rank_cd(c.tsv, (SELECT tsq FROM q)) AS rank
+                FROM chunks c
+                WHERE {_scope("c", by_version)} AND c.tsv @@ (SELECT tsq FROM q)
+                ORDER BY rank DESC
+                LIMIT :candidates
+            ) l
+        )"""
+        )
+        ranks += " UNION ALL SELECT chunk_id, rnk FROM lexical"
+    cap = "WHERE doc_rank <= :per_doc_cap" if per_doc_cap else ""
+    return f"""
+        WITH q AS (
+            SELECT :embedding :: vector AS v,
+                   replace(plainto_tsquery('{TS_CONFIG}', :q)::text, '&', '|')::tsquery AS tsq
+        ),
+        {",".join(arms)},
+        fused AS (
+            SELECT u.chunk_id, sum(1.0 / (:rrf_k + u.rnk)) AS rrf
+            FROM ({ranks}) u
+            GROUP BY u.chunk_id
+        ),
+        ranked AS (
+            SELECT f.chunk_id, f.rrf, c.document_id,
+                   row_number() OVER (PARTITION BY c.document_id ORDER BY f.rrf DESC) AS doc_rank
+            FROM fused f JOIN chunks c ON c.id = f.chunk_id
+        ),
+        top AS (
+            SELECT chunk_id, rrf FROM ranked {cap}
+            ORDER BY rrf DESC, chunk_id
+            LIMIT :k
+        )
+        SELECT c.id AS chunk_id, c.page_number, c.text, c.document_version_id, c.document_id,
+               d.title AS document_title, dv.assets_prefix IS NOT NULL AS page_assets,
+               t.rrf, 1 - sim.dist AS score{", sim.vector" if with_vectors else ""}
+        FROM top t
+        JOIN chunks c ON c.id = t.chunk_id
+        JOIN documents d ON d.id = c.document_id
+        JOIN document_versions dv ON dv.id = c.document_version_id
+        LEFT JOIN LATERAL (
+            SELECT e.vector, e.vector <=> (SELECT v FROM q) AS dist FROM embeddings e
+            WHERE e.chunk_id = c.id AND {model}
+        ) sim ON true
+        ORDER BY t.rrf DESC, c.id
+    """
+
+
+async def search_chunks(
+    db: AsyncSession,
+    q: str,
+    embedding: Any,
+    k: int,
+    *,
+    version_ids: Optional[Sequence[int]] = None,
+    user_id: Optional[int] = None,
+    document_ids: Optional[Sequence[int]] = None,
+    per_doc_cap: Optional[int] = None,
+    mode: Optional[str] = None,
+    with_vectors: bool = False,
+) -> List[RowMapping]:
+    """Top-k chunks for a query in one round trip.
+
+    Scope is either explicit `version_ids` or the latest versions of `user_id`'s documents
+    (optionally `document_ids`). In hybrid mode (RETRIEVAL_MODE) ANN and full-text
+    candidates are ranked separately and merged with reciprocal rank fusion; `dense` skips
+    the lexical arm. `per_doc_cap` limits rows per document. Rows carry `rrf` (fusion
+    score), `score` (cosine similarity), `page_assets` (the version has page thumbnails)
+    and, with `with_vectors`, the stored `vector` (see candidate_vectors).
+    """
+    settings = get_settings()
+    mode = (mode or settings.retrieval_mode).lower()
+    by_version = bool(version_ids)
+    sql = text(
+        _search_sql(by_version, lexical=(mode == "hybrid"), per_doc_cap=per_doc_cap is not None, with_vectors=with_vectors)
+    )
+    candidates = max(k, settings.hybrid_candidates)
+    params: Dict[str, Any] = {
+        "embedding": embedding,
+        "q": q,
+        "k": k,
+        "candidates": candidates,
+        "rrf_k": settings.rrf_k,
+        "model": settings.embedding_model,
+        "per_doc_cap": per_doc_cap,
+    }
+    if by_version:
+        params["version_ids"] = list(version_ids or [])
+    else:
+        ids = list(document_ids or [])
+        params.update({"user_id": user_id, "use_ids": 1 if ids else 0, "ids": ids})
+    # an HNSW scan yields at most ef_search rows: never fewer than the dense arm's LIMIT
+    await apply_search_params_async(db, ef_search=max(settings.hnsw_ef_search, candidates))
+    result = await db.execute(sql.bindparams(vector_param()), params)
+    return list(result.mappings().all())
+
+
+def candidate_vectors(rows: Sequence[RowMapping]) -> np.ndarray:
+    """Stack the `vector` column of search_chunks(with_vectors=True) rows as float32.
+
+    Chunks without an embedding yet get a zero row (no similarity to anything).
+    """
+    parsed = [Vector._from_db(r["vector"]) for r in rows]
+    dim = next((len(v) for v in parsed if v is not None), 0)
+    out = np.zeros((len(rows), dim), dtype=np.float32)
+    for i, v in enumerate(parsed):
+        if v is not None:
+            out[i] = v
+    return out
@@ -5,11 +5,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Tuple
 
-import boto3
-from botocore.client import Config
-
 from packages.common.config import get_settings
-from botocore.exceptions import ClientError
+from packages.common.storage import get_s3_client
 
 
 def _build_storage_key(filename: str) -> str:
@@ -20,28 +17,8 @@ def _build_storage_key(filename: str) -> str:
 
 def create_presigned_post(filename: str, content_type: str) -> tuple[str, dict[str, str], str]:
     settings = get_settings()
-    session = boto3.session.Session()
-    s3 = session.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        aws_access_key_id=settings.s3_access_key,
-        aws_secret_access_key=settings.s3_secret_key,
-        region_name=settings.s3_region,
-        use_ssl=settings.s3_secure,
-        config=Config(signature_version="s3v4"),
-    )
-    # Ensure bucket exists
-    try:
-        s3.head_bucket(Bucket=settings.s3_bucket)
-    except ClientError:
-        try:
-            if settings.s3_region == "us-east-1":
-                s3.create_bucket(Bucket=settings.s3_bucket)
-            else:
-                s3.create_bucket(Bucket=settings.s3_bucket, CreateBucketConfiguration={"LocationConstraint": settings.s3_region})
-        except ClientError:
-            # best-effort; will fail in upload step if truly misconfigured
-            pass
+    # shared client; the bucket is ensured once at API startup
+    s3 = get_s3_client()
     key = _build_storage_key(filename)
     fields = {"Content-Type": content_type}
     conditions = [
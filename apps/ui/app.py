@@ -52,6 +52,19 @@ def list_versions(doc_id: int) -> List[Dict[str, Any]]:
         return []
 
 
+def thumbnail_url(version_id: int, page: int) -> str:
+    return f"{API_BASE_URL}/documents/versions/{version_id}/pages/{page}/thumbnail"
+
+
+def fetch_thumbnail(version_id: int, page: int) -> bytes | None:
+    # None while ingest is still rendering (or for versions indexed before thumbnails)
+    try:
+        resp = requests.get(thumbnail_url(version_id, page), timeout=15)
+        return resp.content if resp.ok else None
+    except Exception:
+        return None
+
+
 def upload_and_notify(file_name: str, content_type: str, data: bytes) -> Dict[str, Any] | None:
     try:
         pre = requests.post(
@@ -90,7 +103,7 @@ with tab1:
     st.subheader("Upload Syllabus (Batch Supported)")
     files = st.file_uploader("Choose PDF files", type=["pdf"], accept_multiple_files=True)
     if st.button("Upload & Index", disabled=(not files)):
-        previews: list[dict[str, object]] = []
+        previews: list[dict[str, Any]] = []
         for f in files or []:
             info = upload_and_notify(f.name, f.type or "application/pdf", f.read())
             if info:
@@ -111,7 +124,7 @@ with tab1:
                     "status": "failed",
                 })
         st.success("Upload complete")
-        # Render previews as dropdowns (expanders) with embedded PDFs
+        # Render previews as dropdowns (expanders): first-page thumbnail, full PDF on demand
         for item in previews:
             if item["status"] != "success":
                 st.error(f"{item['file']}: failed")
@@ -119,8 +132,14 @@ with tab1:
             title = f"{item['file']} (doc {item['document_id']}, v{item['version_id']})"
             with st.expander(title, expanded=False):
                 storage_uri = item.get("storage_uri")
-                if storage_uri:
-                    pdf_url = f"{API_BASE_URL}/files/preview?storage_uri={quote_plus(storage_uri)}"
+                pdf_url = f"{API_BASE_URL}/files/preview?storage_uri={quote_plus(storage_uri)}" if storage_uri else None
+                # thumbnails are rendered during indexing, so they are usually not there yet
+                thumb = fetch_thumbnail(int(item["version_id"]), 1)
+                if thumb:
+                    st.image(thumb, caption="page 1", width=240)
+                    if pdf_url:
+                        st.markdown(f"[Open full PDF]({pdf_url})")
+                elif pdf_url:
                     st.components.v1.iframe(pdf_url, height=480)
                 else:
                     st.caption("Preview unavailable")
@@ -149,17 +168,27 @@ with tab2:
             st.session_state.chat_messages.append({"role": "assistant", "content": answer})
             with st.chat_message("assistant"):
                 st.markdown(answer)
-                cits = data.get("citations", [])
-                if cits:
+                top_chunks = data.get("top_chunks", [])
+                if top_chunks:
                     with st.expander("Citations"):
-                        # citations are page numbers only
-                        for p in cits:
-                            st.caption(f"page {p}")
+                        # one small page image per citation instead of the whole PDF
+                        cols = st.columns(min(len(top_chunks), 5))
+                        for i, c in enumerate(top_chunks):
+                            caption = f"{c.get('document_title', '')} p.{c['page']}"
+                            # fetched here: API_BASE_URL is the in-cluster address, not one the browser can load
+                            thumb = fetch_thumbnail(c["document_version_id"], c["page"]) if c.get("page_assets") else None
+                            with cols[i % len(cols)]:
+                                if thumb:
+                                    st.image(thumb, caption=caption)
+                                else:
+                                    # version indexed without thumbnails (disabled or failed)
+                                    st.caption(caption)
         except Exception as e:
             st.error(f"Chat failed: {e}")
 
 with tab3:
     st.subheader("Calendar Export (ICS)")
+    st.caption(f"Subscribe to every document's latest deadlines: {API_BASE_URL}/calendar/feed.ics")
     docs = list_documents()
     doc_map = {f"{d['id']}: {d['title']}": d["id"] for d in docs}
     doc_label = st.selectbox("Document", list(doc_map.keys()), key="cal_doc") if doc_map else None
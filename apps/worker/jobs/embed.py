@@ -1,31 +1,110 @@
 from __future__ import annotations
 
-from typing import List
+import logging
+from typing import Any, Dict, List, Mapping, Sequence
 
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from apps.worker.worker import celery_app
 from apps.api.db.session import SessionLocal
-from apps.api.db.models import Chunk, Embedding
-from packages.rag.embeddings import embed_texts
+from apps.api.db.bulk import bulk_upsert_embeddings
+from apps.api.db.models import Chunk, Embedding, EmbeddingCache
+from apps.api.db.versions import promote_latest_version
+from packages.common.config import get_settings
+from packages.rag.embeddings import content_hash, embed_texts
+
+
+logger = logging.getLogger(__name__)
+
+
+def _embed_with_cache(db: Session, texts: List[str]) -> tuple[str, int, np.ndarray, int]:
+    """Embed `texts`, reusing vectors from embedding_cache by content hash.
+
+    Only distinct unseen texts go to the provider; new vectors are written back.
+    Returns (model, dim, float32 vectors in input order, cache hits).
+    """
+    hashes = [content_hash(t) for t in texts]
+    cached: Dict[str, object] = {
+        row.content_hash: row.vector
+        for row in db.query(EmbeddingCache.content_hash, EmbeddingCache.vector).filter(
+            EmbeddingCache.content_hash.in_(set(hashes))
+        )
+    }
+    missing: Dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in cached and h not in missing:
+            missing[h] = t
+    model = get_settings().embedding_model
+    if missing:
+        model, dim, new_vectors = embed_texts(list(missing.values()))
+        db.execute(
+            pg_insert(EmbeddingCache)
+            .values([{"content_hash": h, "model": model, "dim": dim, "vector": v} for h, v in zip(missing, new_vectors)])
+            .on_conflict_do_nothing(index_elements=["content_hash"])
+        )
+        cached.update(zip(missing, new_vectors))
+    vectors = np.stack([np.asarray(cached[h], dtype=np.float32) for h in hashes])
+    hits = sum(1 for h in hashes if h not in missing)
+    return model, vectors.shape[1], vectors, hits
+
+
+def embed_and_store(db: Session, document_version_id: int, chunks: Sequence[Mapping[str, Any]]) -> tuple[str, int]:
+    """Embed chunk rows (keys: id, text, user_id, document_id) and upsert their embeddings.
+
+    Goes through the content-addressed cache when enabled. Returns (model, cache hits);
+    caller commits.
+    """
+    texts = [c["text"] for c in chunks]
+    if get_settings().embedding_cache_enabled:
+        model, dim, vectors, hits = _embed_with_cache(db, texts)
+    else:
+        model, dim, vectors = embed_texts(texts)
+        hits = 0
+    bulk_upsert_embeddings(
+        db,
+        (
+            {
+                "chunk_id": c["id"],
+                "model": model,
+                "dim": dim,
+                "vector": vec,
+                "user_id": c["user_id"],
+                "document_id": c["document_id"],
+                "document_version_id": document_version_id,
+            }
+            for c, vec in zip(chunks, vectors)
+        ),
+    )
+    return model, hits
 
 
 @celery_app.task(name="embed.embed_chunks")
 def embed_chunks(document_version_id: int) -> dict:
     db: Session = SessionLocal()
     try:
-        chunks: List[Chunk] = (
-            db.query(Chunk).filter(Chunk.document_version_id == document_version_id).order_by(Chunk.id).all()
+        chunks = (
+            db.query(Chunk.id, Chunk.text, Chunk.user_id, Chunk.document_id)
+            .outerjoin(
+                Embedding, (Embedding.chunk_id == Chunk.id) & (Embedding.model == get_settings().embedding_model)
+            )
+            # rows carried over from a previous version already have vectors (for this model)
+            .filter(Chunk.document_version_id == document_version_id, Embedding.chunk_id.is_(None))
+            .order_by(Chunk.id)
+            .all()
         )
-        texts = [c.text for c in chunks]
-        if not texts:
+        if not chunks:
             return {"ok": True, "embeddings": 0}
-        model, dim, vectors = embed_texts(texts)
-        for chunk, vec in zip(chunks, vectors):
-            db.merge(Embedding(chunk_id=chunk.id, model=model, dim=dim, vector=vec))
+        model, hits = embed_and_store(db, document_version_id, [dict(c._mapping) for c in chunks])
+        # version is queryable now: move the latest pointer and is_latest flags
+        promote_latest_version(db, chunks[0].document_id, document_version_id)
         db.commit()
-        return {"ok": True, "embeddings": len(texts), "model": model}
+        hit_rate = hits / len(chunks)
+        logger.info(
+            "embed_chunks_done",
+            extra={"document_version_id": document_version_id, "embeddings": len(chunks), "cache_hit_rate": hit_rate},
+        )
+        return {"ok": True, "embeddings": len(chunks), "model": model, "cache_hits": hits, "cache_hit_rate": hit_rate}
     finally:
         db.close()
-
-
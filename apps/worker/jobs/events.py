@@ -1,44 +1,50 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
 
-import dateparser
 from sqlalchemy.orm import Session
 
 from apps.worker.worker import celery_app
 from apps.api.db.session import SessionLocal
-from apps.api.db.models import Page, Event
+from apps.api.db.bulk import bulk_insert_events
+from apps.api.db.models import Page
+from packages.common.config import get_settings
+from packages.parsers.dates import extract_dated_lines
 
 
 @celery_app.task(name="events.extract_events")
-def extract_events(document_version_id: int) -> dict:
+def extract_events(document_version_id: int, page_numbers: Optional[List[int]] = None) -> dict:
     db: Session = SessionLocal()
     try:
-        pages: List[Page] = (
-            db.query(Page).filter(Page.document_version_id == document_version_id).order_by(Page.page_number).all()
+        settings = get_settings()
+        query = db.query(Page.page_number, Page.text).filter(Page.document_version_id == document_version_id)
+        if page_numbers is not None:
+            # incremental re-ingest: events of unchanged pages were copied from the previous version
+            query = query.filter(Page.page_number.in_(page_numbers))
+        pages = [(n, text) for n, text in query.order_by(Page.page_number)]
+        # heuristic: lines with 'Exam' or 'Due' + a date-like token (regex prefilter, then dateparser)
+        found = extract_dated_lines(
+            pages,
+            workers=min(settings.event_parse_workers, os.cpu_count() or 1),
+            min_pages=settings.event_parallel_min_pages,
+        )
+        now = datetime.now(timezone.utc)
+        created = bulk_insert_events(
+            db,
+            (
+                {
+                    "document_version_id": document_version_id,
+                    "title": line.title,
+                    "due_at": line.due_at,
+                    "page_number": line.page_number,
+                    "created_at": now,
+                }
+                for line in found
+            ),
         )
-        created = 0
-        for page in pages:
-            # naive heuristic: lines with 'Exam' or 'Due' + a date-like token
-            for line in page.text.splitlines():
-                if "exam" in line.lower() or "due" in line.lower():
-                    dt = dateparser.parse(line, settings={"RETURN_AS_TIMEZONE_AWARE": True})
-                    if dt:
-                        db.add(
-                            Event(
-                                document_version_id=document_version_id,
-                                title=line.strip()[:200],
-                                due_at=dt,
-                                page_number=page.page_number,
-                                source_start_offset=None,
-                                source_end_offset=None,
-                            )
-                        )
-                        created += 1
         db.commit()
         return {"ok": True, "events": created}
     finally:
         db.close()
-
-
@@ -1,40 +1,276 @@
 from __future__ import annotations
 
-import io
+import json
+import logging
 import os
-import re
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import boto3
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from apps.worker.worker import celery_app
 from apps.api.db.session import SessionLocal
-from apps.api.db.models import DocumentVersion, Page, Chunk
-from apps.worker.jobs.embed import embed_chunks
+from apps.api.db.bulk import bulk_insert_chunks, bulk_insert_pages
+from apps.api.db.models import DocumentVersion, Page
+from apps.api.db.versions import (
+    copy_version_rows,
+    find_reusable_version,
+    page_hash,
+    page_hashes,
+    previous_version_id,
+    promote_latest_version,
+)
+from apps.worker.jobs.embed import embed_and_store, embed_chunks
 from apps.worker.jobs.events import extract_events
-from packages.parsers.pdf import extract_pages_from_pdf_bytes
-from packages.rag.chunking import split_text_into_chunks
+from packages.parsers.pdf import PageAssets, iter_pages, iter_pages_with_assets
+from packages.rag.chunking import batched, iter_page_chunks, split_text_into_chunks
 from packages.common.config import get_settings
+from packages.common.storage import downloaded, get_s3_client, page_asset_uri, page_assets_prefix, parse_storage_uri
 
 
-def _read_s3_bytes(storage_uri: str) -> bytes:
-    # storage_uri: s3://bucket/key
+logger = logging.getLogger(__name__)
+
+
+# uploads overlap with parsing; the bound keeps rendered pages from piling up in memory
+_ASSET_UPLOAD_THREADS = 8
+_ASSET_MAX_IN_FLIGHT = 4 * _ASSET_UPLOAD_THREADS
+
+
+class _PageAssetWriter:
+    """Stores page thumbnails and text layers next to the upload while the text is indexed.
+
+    Feed parsed pages through `pages()`, then call `finish()` (or `abort()` if ingest
+    fails). Best-effort: a render or upload failure stops further uploads, deletes what
+    was stored and leaves the version without assets (the UI falls back to the full
+    PDF) instead of failing ingest.
+    """
+
+    def __init__(self, document_version_id: int, storage_uri: str) -> None:
+        self.document_version_id = document_version_id
+        self.prefix = page_assets_prefix(storage_uri)
+        self.failed = False
+        self.stored = 0
+        self._s3 = get_s3_client()
+        self._pool = ThreadPoolExecutor(max_workers=_ASSET_UPLOAD_THREADS)
+        self._pending: Deque[Future] = deque()
+        self._uris: List[str] = []
+
+    def _put(self, uri: str, body: bytes, content_type: str) -> None:
+        bucket, key = parse_storage_uri(uri)
+        # immutable per upload: clients may cache for good and revalidate by ETag
+        self._s3.put_object(
+            Bucket=bucket, Key=key, Body=body, ContentType=content_type, CacheControl="private, max-age=31536000, immutable"
+        )
+
+    def _fail(self, reason: str, exc_info: bool = False) -> None:
+        if not self.failed:
+            logger.warning(
+                "page_assets_failed",
+                extra={"document_version_id": self.document_version_id, "reason": reason},
+                exc_info=exc_info,
+            )
+        self.failed = True
+
+    def _wait_oldest(self) -> None:
+        try:
+            self._pending.popleft().result()
+        except Exception:
+            self._fail("upload", exc_info=True)
+
+    def _submit(self, uri: str, body: bytes, content_type: str) -> None:
+        while len(self._pending) >= _ASSET_MAX_IN_FLIGHT and not self.failed:
+            self._wait_oldest()
+        if self.failed:
+            return
+        self._uris.append(uri)
+        self._pending.append(self._pool.submit(self._put, uri, body, content_type))
+
+    def pages(self, parsed: Iterable[Tuple[int, str, Optional[PageAssets]]]) -> Iterator[Tuple[int, str]]:
+        """Pass (page_number, text) through, uploading each page's assets on the way."""
+        for page_number, text, assets in parsed:
+            if assets is None:
+                self._fail("render")
+            elif not self.failed:
+                self._submit(page_asset_uri(self.prefix, page_number, "jpg"), assets.thumbnail, "image/jpeg")
+                layer = json.dumps(assets.text_layer, separators=(",", ":")).encode()
+                self._submit(page_asset_uri(self.prefix, page_number, "json"), layer, "application/json")
+                self.stored += 1
+            yield page_number, text
+
+    def _drain(self) -> None:
+        while self._pending:
+            self._wait_oldest()
+        self._pool.shutdown()
+
+    def _delete_stored(self) -> None:
+        by_bucket: Dict[str, List[str]] = {}
+        for uri in self._uris:
+            bucket, key = parse_storage_uri(uri)
+            by_bucket.setdefault(bucket, []).append(key)
+        try:
+            for bucket, keys in by_bucket.items():
+                for i in range(0, len(keys), 1000):  # DeleteObjects takes up to 1000 keys
+                    objects = [{"Key": key} for key in keys[i : i + 1000]]
+                    self._s3.delete_objects(Bucket=bucket, Delete={"Objects": objects, "Quiet": True})
+        except Exception:
+            logger.warning("page_assets_cleanup_failed", extra={"prefix": self.prefix}, exc_info=True)
+
+    def finish(self, ver: DocumentVersion) -> int:
+        """Wait for the uploads; sets `ver.assets_prefix` unless anything failed. Returns pages stored."""
+        self._drain()
+        if self.failed:
+            self._delete_stored()
+            return 0
+        ver.assets_prefix = self.prefix
+        return self.stored
+
+    def abort(self) -> None:
+        """Ingest failed: stop uploading and delete what was stored."""
+        for fut in self._pending:
+            fut.cancel()
+        self.failed = True
+        self._drain()
+        self._delete_stored()
+
+
+def _carry_over(db: Session, ver: DocumentVersion, prev_id: Optional[int], page_map: Dict[int, int]) -> dict:
+    """Copy chunks, embeddings and events of unchanged pages from the previous version.
+
+    Returns the reuse counts for the job result; empty when nothing was carried over.
+    """
+    if prev_id is None or not page_map:
+        return {}
+    counts = copy_version_rows(db, prev_id, ver.id, page_map=page_map, include_pages=False)
+    return {
+        "previous_version_id": prev_id,
+        "pages_reused": len(page_map),
+        "chunks_reused": counts["chunks"],
+        "embeddings_reused": counts["embeddings"],
+        "events_reused": counts["events"],
+    }
+
+
+def _ingest_streaming(
+    db: Session,
+    ver: DocumentVersion,
+    pages: Iterable[Tuple[int, str]],
+    max_len: int = 800,
+    overlap: int = 100,
+    prev_id: Optional[int] = None,
+) -> dict:
+    """Single-task ingest: pages -> chunks -> embedding batches -> COPY, in one transaction.
+
+    With `prev_id`, pages whose hash matches a page of that version skip chunking and
+    embedding; their derived rows are copied over instead. Nothing is read back from the
+    database; the version becomes queryable on commit.
+    """
     settings = get_settings()
-    match = re.match(r"s3://([^/]+)/(.+)", storage_uri)
-    if not match:
-        raise ValueError("invalid storage_uri")
-    bucket, key = match.groups()
-    s3 = boto3.client(
-        "s3",
-        endpoint_url=settings.s3_endpoint_url,
-        aws_access_key_id=settings.s3_access_key,
-        aws_secret_access_key=settings.s3_secret_key,
-        region_name=settings.s3_region,
-        use_ssl=settings.s3_secure,
+    doc = ver.document
+    known = page_hashes(db, prev_id) if prev_id is not None else {}
+    page_rows: List[dict] = []
+    page_map: Dict[int, int] = {}
+    changed: List[int] = []
+
+    def tracked(items: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        for page_number, text in items:
+            digest = page_hash(text)
+            page_rows.append(
+                {"document_version_id": ver.id, "page_number": page_number, "text": text, "content_hash": digest}
+            )
+            if digest in known:
+                page_map[page_number] = known[digest]
+                continue
+            changed.append(page_number)
+            yield page_number, text
+
+    chunks = 0
+    hits = 0
+    for batch in batched(iter_page_chunks(tracked(pages), max_len=max_len, overlap=overlap), settings.ingest_batch_size):
+        rows = [
+            {
+                "document_version_id": ver.id,
+                "page_number": page_number,
+                "text": chunk_text,
+                "start_offset": start,
+                "end_offset": end,
+                "user_id": doc.user_id,
+                "document_id": doc.id,
+            }
+            for page_number, start, end, chunk_text in batch
+        ]
+        ids = bulk_insert_chunks(db, rows)
+        _, batch_hits = embed_and_store(db, ver.id, [{**row, "id": cid} for row, cid in zip(rows, ids)])
+        chunks += len(rows)
+        hits += batch_hits
+    bulk_insert_pages(db, page_rows)
+    ver.pages = len(page_rows)
+    reused = _carry_over(db, ver, prev_id, page_map)
+    if not chunks and not reused.get("chunks_reused"):
+        logger.warning("version_without_text", extra={"document_version_id": ver.id})
+    # complete either way: an empty version still replaces the one before it
+    promote_latest_version(db, doc.id, ver.id)
+    db.commit()
+    return {
+        "ok": True,
+        "mode": "streaming",
+        "pages": len(page_rows),
+        "pages_changed": changed,
+        "chunks": chunks,
+        "cache_hits": hits,
+        **reused,
+    }
+
+
+def _document_twin(db: Session, ver: DocumentVersion, sha256: str) -> Optional[int]:
+    """Another version of ver's document holding `sha256`, or None."""
+    return (
+        db.query(DocumentVersion.id)
+        .filter(
+            DocumentVersion.document_id == ver.document_id,
+            DocumentVersion.content_sha256 == sha256,
+            DocumentVersion.id != ver.id,
+        )
+        .scalar()
     )
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    return obj["Body"].read()
+
+
+def _reuse_identical_version(db: Session, ver: DocumentVersion, sha256: str) -> Optional[dict]:
+    """Short-circuit ingest when identical bytes were already indexed.
+
+    Records `sha256` on the pending version, unless another version of the same document
+    holds it (the (document_id, content_sha256) constraint forbids a twin), including one
+    whose upload raced this one: the version then keeps its pending placeholder. When a
+    version with these bytes is fully indexed (any document), its pages, chunks,
+    embeddings and events are cloned server-side into the pending version, which is promoted like a freshly indexed one;
+    the version id returned by notify stays valid either way.
+    Returns the job result, or None when there is nothing to reuse.
+    """
+    twin = _document_twin(db, ver, sha256)
+    if twin is None:
+        try:
+            # claim the hash now rather than with the index, so later uploads see the twin
+            with db.begin_nested():
+                ver.content_sha256 = sha256
+            db.commit()
+        except IntegrityError:
+            # a concurrent upload of the same bytes claimed it first; keep the placeholder
+            twin = _document_twin(db, ver, sha256)
+    # a twin still being indexed (or that failed) is no source; ingest from scratch
+    src = find_reusable_version(db, sha256, exclude_version_id=ver.id)
+    if src is None:
+        return None
+    # same bytes, same renders: point at the source version's page assets
+    ver.assets_prefix = db.query(DocumentVersion.assets_prefix).filter(DocumentVersion.id == src).scalar()
+    counts = copy_version_rows(db, src, ver.id)
+    ver.pages = counts["pages"]
+    promote_latest_version(db, ver.document_id, ver.id)
+    db.commit()
+    result = {"ok": True, "cloned_from": src, "reused": True, **counts}
+    if twin is not None:
+        result["duplicate_of"] = twin
+    return result
 
 
 @celery_app.task(name="ingest.parse_pdf")
@@ -44,15 +280,55 @@ def parse_pdf(document_version_id: int, storage_uri: str) -> dict:
         ver = db.get(DocumentVersion, document_version_id)
         if ver is None:
             return {"ok": False, "error": "version_not_found"}
-        data = _read_s3_bytes(storage_uri)
-        pages = extract_pages_from_pdf_bytes(data)
-        ver.pages = len(pages)
-        for i, text in enumerate(pages, start=1):
-            db.add(Page(document_version_id=ver.id, page_number=i, text=text))
-        db.commit()
-        # chain chunking next
-        chunk_pages.delay(ver.id)
-        return {"ok": True, "pages": len(pages)}
+        settings = get_settings()
+        # never oversubscribe: more parse processes than cores only adds pool overhead
+        workers = min(settings.pdf_parse_workers, os.cpu_count() or 1)
+        # spool to disk and hand PyMuPDF (and parse workers) a path, not a bytes copy
+        with downloaded(get_s3_client(), storage_uri, suffix=".pdf") as obj:
+            reused = _reuse_identical_version(db, ver, obj.sha256)
+            if reused is not None:
+                return reused
+            writer: Optional[_PageAssetWriter] = None
+            pages: Iterable[Tuple[int, str]]
+            if settings.page_assets_enabled:
+                # one pass over the PDF: thumbnails upload while the page text is indexed
+                writer = _PageAssetWriter(ver.id, storage_uri)
+                pages = writer.pages(
+                    iter_pages_with_assets(
+                        obj.path,
+                        width=settings.thumbnail_width,
+                        quality=settings.thumbnail_quality,
+                        workers=workers,
+                        min_pages=settings.pdf_parallel_min_pages,
+                    )
+                )
+            else:
+                pages = iter_pages(obj.path, workers=workers, min_pages=settings.pdf_parallel_min_pages)
+            try:
+                if settings.ingest_mode.lower() == "streaming":
+                    prev_id = previous_version_id(db, ver.document_id, ver.id)
+                    result = _ingest_streaming(db, ver, pages, prev_id=prev_id)
+                    if result["pages_changed"]:
+                        extract_events.delay(ver.id, result["pages_changed"])
+                else:
+                    # chained fallback: parse -> chunk_pages -> embed_chunks (+ extract_events)
+                    page_rows = [
+                        {"document_version_id": ver.id, "page_number": i, "text": text, "content_hash": page_hash(text)}
+                        for i, text in pages
+                    ]
+                    ver.pages = len(page_rows)
+                    bulk_insert_pages(db, page_rows)
+                    db.commit()
+                    # chain chunking next
+                    chunk_pages.delay(ver.id)
+                    result = {"ok": True, "pages": len(page_rows)}
+            except BaseException:
+                if writer is not None:
+                    writer.abort()
+                raise
+            result["page_assets"] = writer.finish(ver) if writer is not None else 0
+            db.commit()
+        return result
     finally:
         db.close()
 
@@ -61,28 +337,44 @@ def parse_pdf(document_version_id: int, storage_uri: str) -> dict:
 def chunk_pages(document_version_id: int, max_len: int = 800, overlap: int = 100) -> dict:
     db: Session = SessionLocal()
     try:
+        ver = db.get(DocumentVersion, document_version_id)
+        if ver is None:
+            return {"ok": False, "error": "version_not_found"}
+        doc = ver.document
         pages: List[Page] = (
             db.query(Page).filter(Page.document_version_id == document_version_id).order_by(Page.page_number).all()
         )
-        created = 0
-        for page in pages:
-            for start, end, chunk_text in split_text_into_chunks(page.text, max_len=max_len, overlap=overlap):
-                db.add(
-                    Chunk(
-                        document_version_id=document_version_id,
-                        page_number=page.page_number,
-                        text=chunk_text,
-                        start_offset=start,
-                        end_offset=end,
-                    )
-                )
-                created += 1
+        prev_id = previous_version_id(db, doc.id, document_version_id)
+        known = page_hashes(db, prev_id) if prev_id is not None else {}
+        page_map = {page.page_number: known[page.content_hash] for page in pages if page.content_hash in known}
+        changed = [page for page in pages if page.page_number not in page_map]
+        rows = [
+            {
+                "document_version_id": document_version_id,
+                "page_number": page.page_number,
+                "text": chunk_text,
+                "start_offset": start,
+                "end_offset": end,
+                "user_id": doc.user_id,
+                "document_id": doc.id,
+            }
+            for page in changed
+            for start, end, chunk_text in split_text_into_chunks(page.text, max_len=max_len, overlap=overlap)
+        ]
+        created = len(bulk_insert_chunks(db, rows))
+        reused = _carry_over(db, ver, prev_id, page_map)
+        if not created:
+            # nothing left to embed: the carried-over rows are complete, or the version has
+            # no text at all (it still replaces the previous version)
+            if not reused.get("chunks_reused"):
+                logger.warning("version_without_text", extra={"document_version_id": document_version_id})
+            promote_latest_version(db, doc.id, document_version_id)
         db.commit()
         # chain embeddings next, then extract events
-        embed_chunks.delay(document_version_id)
-        extract_events.delay(document_version_id)
-        return {"ok": True, "chunks": created}
+        if created:
+            embed_chunks.delay(document_version_id)
+        if changed:
+            extract_events.delay(document_version_id, [page.page_number for page in changed])
+        return {"ok": True, "chunks": created, "pages_changed": [page.page_number for page in changed], **reused}
     finally:
         db.close()
-
-
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 from packages.common.config import get_settings
 
@@ -24,3 +25,11 @@ def create_celery() -> Celery:
 celery_app = create_celery()
 
 
+@worker_process_init.connect
+def _reset_db_pool(**_: object) -> None:
+    # prefork children must not reuse connections opened by the parent before the fork
+    from apps.api.db.session import engine
+
+    engine.dispose(close=False)
+
+
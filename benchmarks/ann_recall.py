@@ -0,0 +1,108 @@
+"""Recall vs latency sweep for the pgvector ANN index on embeddings.vector.
+
+Samples stored embeddings as queries, computes exact top-k with index scans disabled,
+then replays the same queries through the index for each ef_search (HNSW) or probes
+(IVFFlat) value and reports recall@k and latency percentiles.
+
+Usage:
+    python -m benchmarks.ann_recall --ef-search 10 20 40 80 160
+    python -m benchmarks.ann_recall --probes 1 5 10 20 --version-id 42
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from apps.api.db.session import SessionLocal
+from apps.api.db.vector import apply_search_params
+
+
+KNN_SQL = """
+    SELECT e.chunk_id
+    FROM embeddings e
+    WHERE {where}
+    ORDER BY e.vector <=> CAST(:embedding AS vector)
+    LIMIT :k
+"""
+
+
+def _knn_sql(version_id: Optional[int]) -> str:
+    if version_id is None:
+        return KNN_SQL.format(where="TRUE")
+    return KNN_SQL.format(where="e.document_version_id = :dvid")
+
+
+def _sample_queries(n: int) -> List[str]:
+    with SessionLocal() as db:
+        rows = db.execute(
+            text("SELECT vector::text AS v FROM embeddings TABLESAMPLE SYSTEM (10) LIMIT :n"), {"n": n}
+        ).all()
+        if len(rows) < n:
+            rows = db.execute(text("SELECT vector::text AS v FROM embeddings ORDER BY random() LIMIT :n"), {"n": n}).all()
+    return [r.v for r in rows]
+
+
+def _exact(queries: List[str], k: int, version_id: Optional[int]) -> List[set]:
+    truth: List[set] = []
+    sql = text(_knn_sql(version_id))
+    with SessionLocal() as db:
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+        for q in queries:
+            rows = db.execute(sql, {"embedding": q, "k": k, "dvid": version_id}).all()
+            truth.append({r.chunk_id for r in rows})
+    return truth
+
+
+def _run(queries: List[str], truth: List[set], k: int, version_id: Optional[int], ef: Optional[int], probes: Optional[int]) -> dict:
+    sql = text(_knn_sql(version_id))
+    latencies: List[float] = []
+    recalls: List[float] = []
+    with SessionLocal() as db:
+        apply_search_params(db, ef_search=ef, probes=probes)
+        for q, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            rows = db.execute(sql, {"embedding": q, "k": k, "dvid": version_id}).all()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            got = {r.chunk_id for r in rows}
+            recalls.append(len(got & expected) / max(1, len(expected)))
+    latencies.sort()
+    return {
+        "recall": statistics.fmean(recalls),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="*", default=[])
+    parser.add_argument("--probes", type=int, nargs="*", default=[])
+    parser.add_argument("--version-id", type=int, default=None, help="measure filtered recall for one version")
+    args = parser.parse_args()
+    if not args.ef_search and not args.probes:
+        args.ef_search = [10, 20, 40, 80, 160]
+
+    queries = _sample_queries(args.queries)
+    if not queries:
+        raise SystemExit("no embeddings found; ingest some documents first")
+    truth = _exact(queries, args.k, args.version_id)
+
+    print(f"queries={len(queries)} k={args.k} version_id={args.version_id}")
+    print(f"{'knob':<16}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for ef in args.ef_search:
+        r = _run(queries, truth, args.k, args.version_id, ef=ef, probes=None)
+        print(f"{'ef_search=' + str(ef):<16}{r['recall']:>10.3f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+    for probes in args.probes:
+        r = _run(queries, truth, args.k, args.version_id, ef=None, probes=probes)
+        print(f"{'probes=' + str(probes):<16}{r['recall']:>10.3f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Requests per second and latency percentiles of API routes under concurrent load.
+
+Each target is a running API (`label=base_url`). To compare the sync routes with the
+async (asyncpg) ones, serve a checkout from before the port on a second port, e.g.
+
+    git worktree add /tmp/sync <commit-before-async-routes>
+    (cd /tmp/sync && uvicorn apps.api.main:app --port 8001)
+    uvicorn apps.api.main:app --port 8000
+
+Both servers should run with the same worker count and database. Requests cycle through
+`--path` values; latency is measured client-side, from send to full response body.
+
+Usage:
+    python -m benchmarks.api_load --target async=http://localhost:8000 --target sync=http://localhost:8001 \
+        --path /documents --path "/qa/ask?document_version_id=1&q=when+is+the+midterm" \
+        --concurrency 64 256 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import time
+from typing import List, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+
+async def _run(base_url: str, paths: Sequence[str], concurrency: int, requests: int) -> Tuple[float, np.ndarray, int]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors = 0
+    cycle = itertools.cycle(paths)
+    remaining = requests
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        # warm the server's pools and caches before timing
+        await asyncio.gather(*(client.get(p) for p in paths))
+
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                path = next(cycle)
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(path)
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if not ok:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, np.array(latencies), errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, help="label=base_url (repeatable)")
+    parser.add_argument("--path", action="append", help="GET path to request (repeatable, default /documents)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per target and concurrency level")
+    args = parser.parse_args()
+    paths = args.path or ["/documents"]
+
+    print(f"{'target':<12} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency in args.concurrency:
+        for target in args.target:
+            label, _, base_url = target.partition("=")
+            rps, latencies, errors = asyncio.run(_run(base_url, paths, concurrency, args.requests))
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{label:<12} {concurrency:>5} {rps:>9.1f} {p50:>9.1f} {p99:>9.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""ORM vs COPY write path for pages, chunks and embeddings.
+
+Creates a scratch user/document/version, writes synthetic rows both ways inside a
+transaction that is rolled back afterwards (nothing persists), and prints timings.
+
+Usage:
+    python -m benchmarks.bulk_writes --pages 40 --chunks-per-page 6
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from apps.api.db.bulk import bulk_insert_chunks, bulk_insert_pages, bulk_upsert_embeddings
+from apps.api.db.models import Chunk, Document, DocumentVersion, Embedding, Page, User
+from apps.api.db.session import SessionLocal
+
+
+def _scratch_version(db: Session) -> tuple[int, int, int]:
+    user = User(email=f"bench-{random.random()}@local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    doc = Document(user_id=user.id, title="bench", storage_uri="s3://bench/bench.pdf")
+    db.add(doc)
+    db.flush()
+    ver = DocumentVersion(document_id=doc.id, content_sha256=f"bench-{random.random()}", pages=0)
+    db.add(ver)
+    db.flush()
+    return user.id, doc.id, ver.id
+
+
+def _orm(db: Session, n_pages: int, per_page: int, dim: int) -> None:
+    user_id, doc_id, ver_id = _scratch_version(db)
+    for p in range(1, n_pages + 1):
+        db.add(Page(document_version_id=ver_id, page_number=p, text="lorem ipsum " * 200))
+    db.flush()
+    chunks: List[Chunk] = []
+    for p in range(1, n_pages + 1):
+        for i in range(per_page):
+            c = Chunk(
+                document_version_id=ver_id,
+                page_number=p,
+                text="lorem ipsum " * 60,
+                start_offset=i * 700,
+                end_offset=i * 700 + 800,
+                user_id=user_id,
+                document_id=doc_id,
+            )
+            db.add(c)
+            chunks.append(c)
+    db.flush()
+    for c in chunks:
+        vec = [random.random() for _ in range(dim)]
+        db.merge(
+            Embedding(
+                chunk_id=c.id,
+                model="bench",
+                dim=dim,
+                vector=vec,
+                user_id=user_id,
+                document_id=doc_id,
+                document_version_id=ver_id,
+            )
+        )
+    db.flush()
+
+
+def _bulk(db: Session, n_pages: int, per_page: int, dim: int) -> None:
+    user_id, doc_id, ver_id = _scratch_version(db)
+    bulk_insert_pages(
+        db,
+        (
+            {"document_version_id": ver_id, "page_number": p, "text": "lorem ipsum " * 200, "content_hash": None}
+            for p in range(1, n_pages + 1)
+        ),
+    )
+    rows = [
+        {
+            "document_version_id": ver_id,
+            "page_number": p,
+            "text": "lorem ipsum " * 60,
+            "start_offset": i * 700,
+            "end_offset": i * 700 + 800,
+            "user_id": user_id,
+            "document_id": doc_id,
+        }
+        for p in range(1, n_pages + 1)
+        for i in range(per_page)
+    ]
+    ids = bulk_insert_chunks(db, rows)
+    bulk_upsert_embeddings(
+        db,
+        (
+            {
+                "chunk_id": cid,
+                "model": "bench",
+                "dim": dim,
+                "vector": [random.random() for _ in range(dim)],
+                "user_id": user_id,
+                "document_id": doc_id,
+                "document_version_id": ver_id,
+            }
+            for cid in ids
+        ),
+    )
+
+
+def _time(fn: Callable[[Session, int, int, int], None], args: argparse.Namespace) -> float:
+    best = float("inf")
+    for _ in range(args.repeat):
+        db = SessionLocal()
+        try:
+            t0 = time.perf_counter()
+            fn(db, args.pages, args.chunks_per_page, args.dim)
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            db.rollback()
+            db.close()
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--chunks-per-page", type=int, default=6)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = args.pages * (1 + 2 * args.chunks_per_page)
+    orm_s = _time(_orm, args)
+    bulk_s = _time(_bulk, args)
+    print(f"rows written per run: {rows} (pages + chunks + embeddings)")
+    print(f"orm  : {orm_s * 1000:9.1f} ms")
+    print(f"bulk : {bulk_s * 1000:9.1f} ms  ({orm_s / bulk_s:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Event extraction cost: previous per-line dateparser loop vs regex prefilter + memo (+ process pool).
+
+The corpus is a set of synthetic syllabus schedules built from real-looking lines: weekly
+schedule rows, assignment deadlines in several date formats, exam announcements, and
+policy prose that says "due" or "exam" without naming a date. Course terms differ,
+but the recurring rows ("Reading response due Friday") repeat as they do in real
+syllabi. Runs offline.
+
+Usage:
+    python -m benchmarks.event_extraction --syllabi 5 --workers 1 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+import dateparser
+
+from packages.parsers.dates import extract_dated_lines
+
+SCHEDULE = [
+    "Week {w} ({md}): {topic}",
+    "Week {w} — {topic}. Reading: Chapter {ch}",
+    "{dow}, {mon} {d}: {topic} (lecture)",
+    "HW{n} due {m}/{d} at 11:59pm on Canvas",
+    "Problem Set {n} due {dow} {mon} {d}",
+    "Reading response due Friday",
+    "Lab report {n} due {mon}. {d}, {y}",
+    "Quiz {n} (in class) — {dow}",
+    "Midterm Exam: {dow}, {month} {d}, {y}, in class",
+    "Project proposal due {y}-{mm:02d}-{d:02d}",
+    "Final Exam — {month} {d}th, 9:00–11:00am, Room {room}",
+    "Exam review session {dow} evening",
+    "Homework is due at the start of class",
+]
+PROSE = [
+    "Late work is due to circumstances beyond your control only with documentation.",
+    "Each exam covers material from lectures, readings, and labs.",
+    "Assignments are due on the course site unless otherwise noted.",
+    "Office hours are held in the department lounge; no appointment is needed.",
+    "Academic integrity violations on any exam result in a failing grade.",
+    "Grading: homework 30%, labs 20%, midterm 20%, final exam 30%.",
+    "Students needing accommodations for exams should contact the disability office.",
+    "Participation is assessed throughout the term and is due diligence, not attendance.",
+]
+TOPICS = [
+    "Introduction and course overview", "Probability review", "Linear regression", "Classification",
+    "Sorting and searching", "Graph algorithms", "Thermodynamics I", "Cell biology", "Supply and demand",
+    "Recursion", "Hypothesis testing", "Dynamic programming", "Organic reactions", "Game theory",
+]
+
+
+def build_corpus(n_syllabi: int, seed: int = 0) -> List[List[Tuple[int, str]]]:
+    """`n_syllabi` documents of 12–30 pages: [(page_number, text), ...] each."""
+    rng = random.Random(seed)
+    corpus = []
+    for s in range(n_syllabi):
+        start = date(2026, rng.choice([1, 8, 9]), rng.randint(1, 20))
+        pages: List[Tuple[int, str]] = []
+        n_pages = rng.randint(12, 30)
+        week = 1
+        for p in range(1, n_pages + 1):
+            lines = []
+            for _ in range(rng.randint(20, 35)):
+                if rng.random() < 0.4:
+                    lines.append(rng.choice(PROSE))
+                    continue
+                day = start + timedelta(days=7 * (week - 1) + rng.randint(0, 4))
+                lines.append(
+                    rng.choice(SCHEDULE).format(
+                        w=week, n=week, ch=week + 1, topic=rng.choice(TOPICS), room=100 + s,
+                        dow=day.strftime("%A"), mon=day.strftime("%b"), month=day.strftime("%B"),
+                        d=day.day, m=day.month, mm=day.month, y=day.year, md=day.strftime("%b %d"),
+                    )
+                )
+                if rng.random() < 0.15:
+                    week += 1
+            pages.append((p, "\n".join(lines)))
+        corpus.append(pages)
+    return corpus
+
+
+def _previous(pages: List[Tuple[int, str]]) -> int:
+    # the loop extract_events ran before the prefilter: dateparser on every keyword line
+    found = 0
+    for _, text in pages:
+        for line in text.splitlines():
+            if "exam" in line.lower() or "due" in line.lower():
+                if dateparser.parse(line, settings={"RETURN_AS_TIMEZONE_AWARE": True}):
+                    found += 1
+    return found
+
+
+def _timed(fn: Callable[[], int]) -> Tuple[float, int]:
+    t0 = time.perf_counter()
+    n = fn()
+    return time.perf_counter() - t0, n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--syllabi", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--min-pages", type=int, default=1, help="pool threshold (per document)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.syllabi)
+    n_pages = sum(len(doc) for doc in corpus)
+    n_lines = sum(len(text.splitlines()) for doc in corpus for _, text in doc)
+    print(f"{args.syllabi} syllabi, {n_pages} pages, {n_lines} lines")
+    dateparser.parse("Oct 12")  # load language data before timing
+
+    base, base_n = _timed(lambda: sum(_previous(doc) for doc in corpus))
+    print(f"{'previous loop':<22} {base:>8.2f} s  {base_n:>6} events")
+    for workers in args.workers:
+        elapsed, n = _timed(
+            lambda: sum(len(extract_dated_lines(doc, workers=workers, min_pages=args.min_pages)) for doc in corpus)
+        )
+        label = f"prefilter+memo w={workers}"
+        print(f"{label:<22} {elapsed:>8.2f} s  {n:>6} events  ({base / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
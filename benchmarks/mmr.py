@@ -0,0 +1,95 @@
+"""Latency of /qa/chat diversification: previous token-set loop vs NumPy MMR (offline).
+
+Candidates are synthetic ~800-character chunks with random 1536-d vectors. The token
+loop is the pre-NumPy selection (regex normalization and token-set overlap against
+every selected chunk). It walks rows in score order and stops after k accepts, so its
+cost grows with k and with rejected near-duplicates; NumPy MMR rescores all n
+candidates at every step (one matrix-vector product).
+
+Usage:
+    python -m benchmarks.mmr --candidates 50 100 200 500 --k 5 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from packages.rag.diversify import mmr
+
+WORDS = "exam midterm final quiz homework due week lecture office hours grading policy late reading lab".split()
+# syllabus boilerplate repeats, so chunks share a common vocabulary plus their own terms
+VOCAB = WORDS + [f"term{i}" for i in range(3000)]
+
+
+def _token_mmr(texts: List[str], scores: List[float], docs: List[int], k: int, cap: int) -> List[int]:
+    def norm_text(t: str) -> str:
+        t = t.lower().strip()
+        t = re.sub(r"https?://\S+", " ", t)
+        return re.sub(r"\s+", " ", t)
+
+    def sim(a: str, b: str) -> float:
+        aset, bset = set(a.split()), set(b.split())
+        if not aset or not bset:
+            return 0.0
+        return len(aset & bset) / max(1, min(len(aset), len(bset)))
+
+    selected: List[int] = []
+    norms: List[str] = []
+    counts: Dict[int, int] = {}
+    for i, t in enumerate(texts):
+        if counts.get(docs[i], 0) >= cap:
+            continue
+        cand = norm_text(t)
+        if any(sim(cand, s) > 0.9 for s in norms):
+            continue
+        _ = scores[i] - 0.7 * (max(sim(cand, s) for s in norms) if norms else 0.0)
+        selected.append(i)
+        norms.append(cand)
+        counts[docs[i]] = counts.get(docs[i], 0) + 1
+        if len(selected) >= k:
+            break
+    return selected
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    random.seed(0)
+    print(f"{'n':>5} {'k':>3} {'token loop ms':>14} {'numpy mmr ms':>13}")
+    for n in args.candidates:
+        texts = [" ".join(random.choices(VOCAB, k=130)) for _ in range(n)]
+        vectors = rng.standard_normal((n, args.dim)).astype(np.float32)
+        scores = sorted(rng.random(n).tolist(), reverse=True)
+        docs = [i % args.docs for i in range(n)]
+        relevance = np.array(scores, dtype=np.float32)
+        for k in args.k:
+            cap = max(2, k // 2)
+            loop_ms = _best_ms(lambda: _token_mmr(texts, scores, docs, k, cap), args.repeat)
+            numpy_ms = _best_ms(lambda: mmr(vectors, relevance, k, groups=docs, per_group_cap=cap), args.repeat)
+            print(f"{n:5d} {k:3d} {loop_ms:14.2f} {numpy_ms:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Serial vs process-pool PDF text extraction on a synthetic long syllabus.
+
+Builds a text-heavy PDF (default 240 pages), then times total extraction and
+time-to-first-page for each worker count, from bytes and from a file path.
+
+Usage:
+    python -m benchmarks.pdf_extract --pages 240 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import fitz
+
+from packages.parsers.pdf import PdfSource, iter_pages
+
+
+LINE = "Week {w}: Lecture {p} - readings ch. {p}, problem set due Friday, 11:59pm. Office hours Tue/Thu."
+
+
+def make_pdf(n_pages: int) -> bytes:
+    doc = fitz.open()
+    for p in range(1, n_pages + 1):
+        page = doc.new_page()
+        text = "\n".join(LINE.format(w=(p + i) // 3 + 1, p=p) for i in range(45))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 756), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _run(source: PdfSource, workers: int, min_pages: int) -> tuple[float, float, int]:
+    t0 = time.perf_counter()
+    first = 0.0
+    n = 0
+    for _ in iter_pages(source, workers=workers, min_pages=min_pages):
+        if n == 0:
+            first = time.perf_counter() - t0
+        n += 1
+    return time.perf_counter() - t0, first, n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=240)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_pdf(args.pages)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        print(f"pages={args.pages} size={len(data) / 1e6:.1f}MB")
+        print(f"{'source':<8}{'workers':>8}{'total ms':>12}{'first page ms':>15}")
+        sources: List[tuple[str, PdfSource]] = [("bytes", data), ("path", path)]
+        for label, source in sources:
+            for w in args.workers:
+                runs: List[tuple[float, float, int]] = [_run(source, w, min_pages=1) for _ in range(args.repeat)]
+                total, first, _ = min(runs)
+                print(f"{label:<8}{w:>8}{total * 1000:>12.1f}{first * 1000:>15.1f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
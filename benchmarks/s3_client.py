@@ -0,0 +1,94 @@
+"""Per-request S3 cost behind /files/presign and /files/preview: client per call vs shared client.
+
+"per-call" rebuilds what the routes did before: a new session and client on every
+request, plus `head_bucket` before each presign. "shared" uses get_s3_client(),
+whose keep-alive pool is reused across requests. Preview fetches a small object
+uploaded for the run and removes it afterwards. With `--offline`, only client
+construction + presign signing are timed, with no network calls.
+
+Usage:
+    python -m benchmarks.s3_client --iterations 50
+    python -m benchmarks.s3_client --offline --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import uuid
+from typing import Callable, List
+
+import boto3
+from botocore.client import Config
+
+from packages.common.config import get_settings
+from packages.common.storage import get_s3_client
+
+
+def _new_client():
+    settings = get_settings()
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        region_name=settings.s3_region,
+        use_ssl=settings.s3_secure,
+        config=Config(signature_version="s3v4"),
+    )
+
+
+def _timed_ms(fn: Callable[[], object], iterations: int) -> List[float]:
+    fn()  # warm-up (imports, endpoint resolution, first connection)
+    out = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--offline", action="store_true", help="skip head_bucket and object reads")
+    args = parser.parse_args()
+    bucket = get_settings().s3_bucket
+
+    def presign(s3) -> None:
+        s3.generate_presigned_post(Bucket=bucket, Key="bench/presign.pdf", ExpiresIn=600)
+
+    def presign_per_call() -> None:
+        s3 = _new_client()
+        if not args.offline:
+            s3.head_bucket(Bucket=bucket)
+        presign(s3)
+
+    cases = {
+        "presign per-call": presign_per_call,
+        "presign shared": lambda: presign(get_s3_client()),
+    }
+    key = f"bench/{uuid.uuid4().hex}.pdf"
+    if not args.offline:
+        get_s3_client().put_object(Bucket=bucket, Key=key, Body=b"%PDF-1.4\n" + b"0" * 64 * 1024)
+
+        def fetch(s3) -> None:
+            s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+        cases["preview per-call"] = lambda: fetch(_new_client())
+        cases["preview shared"] = lambda: fetch(get_s3_client())
+
+    try:
+        print(f"{'case':<18} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, fn in cases.items():
+            times = sorted(_timed_ms(fn, args.iterations))
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            print(f"{name:<18} {statistics.mean(times):>9.2f} {statistics.median(times):>9.2f} {p95:>9.2f}")
+    finally:
+        if not args.offline:
+            get_s3_client().delete_object(Bucket=bucket, Key=key)
+
+
+if __name__ == "__main__":
+    main()
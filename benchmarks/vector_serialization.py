@@ -0,0 +1,78 @@
+"""Client-side cost of shipping vectors to Postgres, per encoding (offline).
+
+Compares a single query vector rendered as pgvector's stock text literal, the compact
+`%.9g` literal used by `vector_param`, and pgvector's binary send format; then builds a
+COPY stream of embedding rows in text and in binary format. Prints time and bytes.
+
+Usage:
+    python -m benchmarks.vector_serialization --dim 1536 --rows 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from pgvector.utils import Vector
+
+from apps.api.db.bulk import EMBEDDING_BINARY_ENCODERS, EMBEDDING_COLUMNS, encode_copy_binary, encode_copy_text
+from apps.api.db.vector import vector_text
+
+
+def _best(fn: Callable[[], object], repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+    print(f"query vector ({args.dim} dims)")
+    encoders = {
+        "text (pgvector)": lambda: Vector._to_db(query),
+        "text (%.9g)": lambda: vector_text(query),
+        "binary": lambda: Vector._to_db_binary(query),
+    }
+    for name, fn in encoders.items():
+        seconds = _best(fn, args.repeat, 200)
+        print(f"  {name:16s} {seconds * 1e6:9.1f} us  {len(fn()):7d} bytes")  # type: ignore[arg-type]
+
+    vectors = rng.standard_normal((args.rows, args.dim)).astype(np.float32)
+    rows = [
+        {
+            "chunk_id": i,
+            "model": "text-embedding-3-small",
+            "dim": args.dim,
+            "vector": vectors[i],
+            "user_id": 1,
+            "document_id": 1,
+            "document_version_id": 1,
+        }
+        for i in range(args.rows)
+    ]
+    print(f"COPY stream ({args.rows} embedding rows)")
+    streams = {
+        "text": lambda: encode_copy_text(EMBEDDING_COLUMNS, rows)[0],
+        "binary": lambda: encode_copy_binary(EMBEDDING_COLUMNS, rows, EMBEDDING_BINARY_ENCODERS)[0],
+    }
+    for name, fn in streams.items():
+        seconds = _best(fn, max(1, args.repeat // 2), 1)
+        size = len(fn().getvalue())  # type: ignore[attr-defined]
+        print(f"  {name:16s} {seconds * 1000:9.1f} ms  {size / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,16 @@ class AppSettings(BaseSettings):
     database_url: PostgresDsn = Field(..., alias="POSTGRES_DSN")
     redis_url: RedisDsn = Field(..., alias="REDIS_URL")
 
+    # DB connection pools, per engine (the API runs a sync and an async engine). Size them so
+    # replicas * engines * (pool_size + max_overflow) stays below Postgres max_connections.
+    service_role: str = Field(default="api", alias="SERVICE_ROLE", description="api|worker: selects the pool profile")
+    api_db_pool_size: int = Field(default=10, alias="API_DB_POOL_SIZE")
+    api_db_max_overflow: int = Field(default=10, alias="API_DB_MAX_OVERFLOW")
+    worker_db_pool_size: int = Field(default=2, alias="WORKER_DB_POOL_SIZE", description="Per worker process")
+    worker_db_max_overflow: int = Field(default=2, alias="WORKER_DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(default=10.0, alias="DB_POOL_TIMEOUT", description="Max wait for a connection")
+    db_pool_recycle_seconds: int = Field(default=1800, alias="DB_POOL_RECYCLE", description="Reconnect older connections")
+
     # S3 / MinIO
     s3_endpoint_url: str = Field(..., alias="S3_ENDPOINT_URL")
     s3_access_key: str = Field(..., alias="S3_ACCESS_KEY")
@@ -40,6 +50,9 @@ class AppSettings(BaseSettings):
     s3_bucket: str = Field(..., alias="S3_BUCKET")
     s3_region: str = Field(default="us-east-1", alias="S3_REGION")
     s3_secure: bool = Field(default=False, alias="S3_SECURE")
+    s3_max_pool_connections: int = Field(default=32, alias="S3_MAX_POOL_CONNECTIONS", description="Shared client pool")
+    storage_chunk_bytes: int = Field(default=1024 * 1024, alias="STORAGE_CHUNK_BYTES", description="Download chunk size")
+    storage_tmp_dir: Optional[str] = Field(default=None, alias="STORAGE_TMP_DIR", description="Spool dir (default: system tmp)")
 
     # Security
     secret_key: str = Field(default="dev-secret", alias="SECRET_KEY")
@@ -48,8 +61,67 @@ class AppSettings(BaseSettings):
     embedding_provider: str = Field(default="none", alias="EMBEDDING_PROVIDER")
     embedding_model: str = Field(default="text-embedding-3-small", alias="EMBEDDING_MODEL")
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
+    embedding_batch_size: int = Field(default=512, alias="EMBEDDING_BATCH_SIZE", description="Max inputs per request")
+    embedding_batch_tokens: int = Field(default=150_000, alias="EMBEDDING_BATCH_TOKENS", description="Est. tokens per request")
+    embedding_concurrency: int = Field(default=4, alias="EMBEDDING_CONCURRENCY", description="Parallel requests")
+    embedding_max_retries: int = Field(default=5, alias="EMBEDDING_MAX_RETRIES")
+    embedding_timeout_seconds: float = Field(default=60.0, alias="EMBEDDING_TIMEOUT_SECONDS")
+    embedding_cache_enabled: bool = Field(default=True, alias="EMBEDDING_CACHE_ENABLED", description="Reuse vectors by text hash")
     llm_provider: str = Field(default="none", alias="LLM_PROVIDER")
     llm_model: str = Field(default="gpt-4o-mini", alias="LLM_MODEL")
+    llm_timeout_seconds: float = Field(default=30.0, alias="LLM_TIMEOUT_SECONDS")
+    llm_max_connections: int = Field(default=20, alias="LLM_MAX_CONNECTIONS", description="Keep-alive pool size")
+
+    # Ingest pipeline
+    ingest_mode: str = Field(default="streaming", alias="INGEST_MODE", description="streaming|chained")
+    ingest_batch_size: int = Field(default=256, alias="INGEST_BATCH_SIZE", description="Chunks per embed/insert batch")
+    pdf_parse_workers: int = Field(default=4, alias="PDF_PARSE_WORKERS", description="Processes for page-sharded parsing")
+    pdf_parallel_min_pages: int = Field(default=64, alias="PDF_PARALLEL_MIN_PAGES")
+    event_parse_workers: int = Field(default=4, alias="EVENT_PARSE_WORKERS", description="Processes for date parsing")
+    event_parallel_min_pages: int = Field(default=40, alias="EVENT_PARALLEL_MIN_PAGES")
+    page_assets_enabled: bool = Field(default=True, alias="PAGE_ASSETS_ENABLED", description="Thumbnails + text layer")
+    thumbnail_width: int = Field(default=240, alias="THUMBNAIL_WIDTH", description="Pixels")
+    thumbnail_quality: int = Field(default=70, alias="THUMBNAIL_QUALITY", description="JPEG quality")
+
+    # Query-embedding cache (in-process LRU backed by Redis)
+    query_cache_enabled: bool = Field(default=True, alias="QUERY_CACHE_ENABLED")
+    query_cache_max_entries: int = Field(default=2048, alias="QUERY_CACHE_MAX_ENTRIES")
+    query_cache_ttl_seconds: int = Field(default=86400, alias="QUERY_CACHE_TTL_SECONDS")
+    query_cache_redis: bool = Field(default=True, alias="QUERY_CACHE_REDIS", description="Use Redis as second tier")
+
+    # Semantic answer cache for /qa/chat (scoped to the exact document versions searched)
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_max_distance: float = Field(
+        default=0.05, alias="ANSWER_CACHE_MAX_DISTANCE", description="Max cosine distance between query embeddings"
+    )
+    answer_cache_ttl_seconds: int = Field(default=3600, alias="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_scopes: int = Field(default=512, alias="ANSWER_CACHE_MAX_SCOPES")
+    answer_cache_max_per_scope: int = Field(default=64, alias="ANSWER_CACHE_MAX_PER_SCOPE")
+    answer_cache_redis: bool = Field(default=True, alias="ANSWER_CACHE_REDIS", description="Use Redis as second tier")
+
+    # Rendered ICS event blocks per document version (keyed by the version's event set)
+    ics_cache_max_entries: int = Field(default=1024, alias="ICS_CACHE_MAX_ENTRIES")
+    ics_cache_ttl_seconds: int = Field(default=86400, alias="ICS_CACHE_TTL_SECONDS")
+
+    # Vector search (pgvector ANN index + per-query search knobs)
+    vector_index: str = Field(default="hnsw", alias="VECTOR_INDEX", description="hnsw|ivfflat|none (read by migrations)")
+    hnsw_m: int = Field(default=16, alias="HNSW_M")
+    hnsw_ef_construction: int = Field(default=64, alias="HNSW_EF_CONSTRUCTION")
+    hnsw_ef_search: int = Field(default=40, alias="HNSW_EF_SEARCH")
+    hnsw_iterative_scan: str = Field(
+        default="relaxed_order",
+        alias="HNSW_ITERATIVE_SCAN",
+        description="off|relaxed_order|strict_order (skipped on servers with pgvector < 0.8)",
+    )
+    ivfflat_lists: int = Field(default=100, alias="IVFFLAT_LISTS")
+    ivfflat_probes: int = Field(default=10, alias="IVFFLAT_PROBES")
+
+    # Retrieval (dense ANN + Postgres full-text, fused with reciprocal rank fusion)
+    retrieval_mode: str = Field(default="hybrid", alias="RETRIEVAL_MODE", description="hybrid|dense")
+    hybrid_candidates: int = Field(default=50, alias="HYBRID_CANDIDATES", description="Candidates per arm before fusion")
+    rrf_k: int = Field(default=60, alias="RRF_K", description="Rank damping constant in 1/(k + rank)")
+    mmr_candidates: int = Field(default=40, alias="MMR_CANDIDATES", description="Fused rows /qa/chat diversifies over")
+    mmr_lambda: float = Field(default=0.7, alias="MMR_LAMBDA", description="1 = relevance only, 0 = diversity only")
 
     @property
     def s3(self) -> S3Settings:
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from redis import Redis
+
+from packages.common.config import get_settings
+
+
+@lru_cache
+def get_sync_redis() -> Redis:
+    """Return a process-wide synchronous Redis client (binary responses).
+
+    Intended for best-effort caches used from sync code paths; short socket timeouts keep
+    a slow or absent Redis from stalling requests. Callers should treat errors as misses.
+    """
+    settings = get_settings()
+    return Redis.from_url(
+        settings.redis_url.unicode_string(),
+        socket_timeout=0.25,
+        socket_connect_timeout=0.25,
+        health_check_interval=30,
+    )
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, NamedTuple, Optional, Tuple
+
+import boto3
+from botocore.client import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from packages.common.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_s3_client: Optional[Any] = None
+_s3_client_lock = threading.Lock()
+
+_S3_URI = re.compile(r"s3://([^/]+)/(.+)")
+
+
+def get_s3_client() -> Any:
+    """Return the process-wide S3 client, created on first use.
+
+    boto3 clients are thread-safe, so API threads and worker tasks share one client and its
+    keep-alive pool (S3_MAX_POOL_CONNECTIONS) instead of paying client construction and a
+    fresh connection per call. Create it after forking (prefork workers call this per task).
+    """
+    global _s3_client
+    if _s3_client is None:
+        # sessions are not thread-safe and concurrent first calls must not build several clients
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = _build_s3_client()
+    return _s3_client
+
+
+def _build_s3_client() -> Any:
+    settings = get_settings()
+    return boto3.session.Session().client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        region_name=settings.s3_region,
+        use_ssl=settings.s3_secure,
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.s3_max_pool_connections,
+            tcp_keepalive=True,
+            retries={"mode": "standard"},
+        ),
+    )
+
+
+def ensure_bucket() -> None:
+    """Create S3_BUCKET if it does not exist (best-effort; run once at startup)."""
+    settings = get_settings()
+    s3 = get_s3_client()
+    try:
+        s3.head_bucket(Bucket=settings.s3_bucket)
+        return
+    except ClientError:
+        pass
+    except BotoCoreError:
+        logger.warning("s3_unreachable", exc_info=True)
+        return
+    try:
+        if settings.s3_region == "us-east-1":
+            s3.create_bucket(Bucket=settings.s3_bucket)
+        else:
+            s3.create_bucket(
+                Bucket=settings.s3_bucket, CreateBucketConfiguration={"LocationConstraint": settings.s3_region}
+            )
+    except (BotoCoreError, ClientError):
+        # uploads fail visibly later if storage is truly misconfigured
+        logger.warning("s3_create_bucket_failed", exc_info=True)
+
+
+def parse_storage_uri(storage_uri: str) -> Tuple[str, str]:
+    """Split s3://bucket/key into (bucket, key)."""
+    match = _S3_URI.match(storage_uri)
+    if not match:
+        raise ValueError("invalid storage_uri")
+    bucket, key = match.groups()
+    return bucket, key
+
+
+def page_assets_prefix(storage_uri: str) -> str:
+    """Where page thumbnails/text layers of an upload live: a `pages/` folder next to it."""
+    bucket, key = parse_storage_uri(storage_uri)
+    folder = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+    return f"s3://{bucket}/{folder}pages/"
+
+
+def page_asset_uri(prefix: str, page_number: int, kind: str) -> str:
+    """`kind` is "jpg" (thumbnail) or "json" (text layer)."""
+    return f"{prefix}{page_number:04d}.{kind}"
+
+
+class SpooledObject(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+
+
+def download_to_path(s3: Any, storage_uri: str, suffix: str = "") -> SpooledObject:
+    """Stream an object to a temporary file in fixed-size chunks, hashing it on the way.
+
+    Memory stays bounded by STORAGE_CHUNK_BYTES regardless of object size. The caller
+    owns the file at `.path` and must remove it.
+    """
+    settings = get_settings()
+    bucket, key = parse_storage_uri(storage_uri)
+    obj = s3.get_object(Bucket=bucket, Key=key)
+    fd, path = tempfile.mkstemp(suffix=suffix or os.path.splitext(key)[1], dir=settings.storage_tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in obj["Body"].iter_chunks(settings.storage_chunk_bytes):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledObject(path, digest.hexdigest(), size)
+
+
+@contextmanager
+def downloaded(s3: Any, storage_uri: str, suffix: str = "") -> Iterator[SpooledObject]:
+    """Context manager around download_to_path that removes the file on exit.
+
+    Example:
+        with downloaded(s3, uri) as obj:
+            fitz.open(obj.path)
+    """
+    obj = download_to_path(s3, storage_uri, suffix=suffix)
+    try:
+        yield obj
+    finally:
+        os.unlink(obj.path)
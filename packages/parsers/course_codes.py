@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+
+# subject letters + 3-digit number: "CS 101", "MATH-221", "cs101_syllabus.pdf"
+_COURSE_CODE = re.compile(r"(?<![A-Z])([A-Z]{2,})[ _-]?(\d{3})(?!\d)")
+
+
+def extract_course_codes(text: str) -> List[str]:
+    """Normalized course codes in `text` ("CS 101" -> "CS101"), de-duplicated in order."""
+    seen: dict[str, None] = {}
+    for subject, number in _COURSE_CODE.findall(text.upper()):
+        seen.setdefault(subject + number, None)
+    return list(seen)
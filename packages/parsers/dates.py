@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import dateparser
+
+from packages.parsers.pdf import page_ranges
+
+
+logger = logging.getLogger(__name__)
+
+EVENT_KEYWORDS = ("exam", "due")
+
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_WEEKDAYS = r"mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?"
+_TIME = r"(?:\s*(?:,|at|@)?\s*\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.))?"
+
+# Calendar dates inside a line: "Thursday, October 12, 2026", "Oct. 12th", "12 Oct 2026",
+# "2026-10-12", "9/19/26", each with an optional time ("at 11:59pm"). Bare weekdays and
+# relative phrases are not matched: they would resolve against the ingest date.
+DATE_SPAN = re.compile(
+    rf"\b(?:(?:{_WEEKDAYS})\.?,?\s+)?(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?\b(?:,?\s+\d{{4}}\b)?{_TIME}"
+    rf"|\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTHS})\.?(?:,?\s+\d{{4}})?\b{_TIME}"
+    rf"|\b\d{{4}}-\d{{1,2}}-\d{{1,2}}\b{_TIME}"
+    rf"|\b\d{{1,2}}/\d{{1,2}}(?:/\d{{2,4}})?\b{_TIME}",
+    re.IGNORECASE,
+)
+
+# the span regex only knows English month/weekday names; this also skips language detection
+_LANGUAGES = ["en"]
+_DATEPARSER_SETTINGS = {"RETURN_AS_TIMEZONE_AWARE": True}
+
+
+class DatedLine(NamedTuple):
+    page_number: int
+    title: str
+    due_at: datetime
+
+
+def date_spans(line: str) -> List[str]:
+    """Date-like substrings of an event line ("exam"/"due"); [] for any other line."""
+    low = line.lower()
+    if not any(k in low for k in EVENT_KEYWORDS):
+        return []
+    return [m.group(0) for m in DATE_SPAN.finditer(line)]
+
+
+class DateMemo:
+    """dateparser.parse memoized on the normalized date span.
+
+    Only short spans reach dateparser (not whole lines), and schedules repeat the same
+    dates across assignments, so most lookups hit. Keep one memo per extraction run.
+    """
+
+    def __init__(self) -> None:
+        self._memo: Dict[str, Optional[datetime]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, span: str) -> Optional[datetime]:
+        key = " ".join(span.split()).lower()
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+        self.misses += 1
+        dt = dateparser.parse(key, languages=_LANGUAGES, settings=_DATEPARSER_SETTINGS)
+        self._memo[key] = dt
+        return dt
+
+
+def find_dated_lines(pages: Iterable[Tuple[int, str]], memo: Optional[DateMemo] = None) -> List[DatedLine]:
+    """Event lines of `pages` ((page_number, text) pairs) with their first parseable date, in order."""
+    memo = memo or DateMemo()
+    found: List[DatedLine] = []
+    for page_number, text in pages:
+        for line in text.splitlines():
+            for span in date_spans(line):
+                dt = memo.parse(span)
+                if dt:
+                    found.append(DatedLine(page_number, line.strip()[:200], dt))
+                    break
+    return found
+
+
+def extract_dated_lines(pages: Sequence[Tuple[int, str]], workers: int = 1, min_pages: int = 40) -> List[DatedLine]:
+    """find_dated_lines, sharded by page range over a process pool for long documents.
+
+    Runs serially below `min_pages` pages, with `workers <= 1`, or inside a daemonic
+    process. Output order matches the serial run.
+    """
+    parallel = workers > 1 and len(pages) >= min_pages
+    if parallel and multiprocessing.current_process().daemon:
+        # daemonic processes cannot fork children; parse serially
+        logger.warning("date_parallel_unavailable_in_daemon")
+        parallel = False
+    if not parallel:
+        return find_dated_lines(pages)
+    shards = [list(pages[start:end]) for start, end in page_ranges(len(pages), workers)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        return [line for shard in pool.map(find_dated_lines, shards) for line in shard]
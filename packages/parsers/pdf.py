@@ -1,23 +1,148 @@
 from __future__ import annotations
 
-from typing import List
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import fitz  # PyMuPDF
 
 
-def extract_pages_from_pdf_bytes(pdf_bytes: bytes) -> List[str]:
-    """Extract plain text per page from PDF bytes using PyMuPDF.
+logger = logging.getLogger(__name__)
 
-    Returns a list of page texts in order.
+# raw PDF bytes or a filesystem path
+PdfSource = Union[bytes, str, "os.PathLike[str]"]
+
+# set in each pool worker by _init_worker so shards only ship page ranges
+_WORKER_SOURCE: Optional[PdfSource] = None
+
+
+def _open(source: PdfSource) -> fitz.Document:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(os.fspath(source))
+
+
+def _init_worker(source: PdfSource) -> None:
+    global _WORKER_SOURCE
+    _WORKER_SOURCE = source
+
+
+def _page_text(page: fitz.Page) -> str:
+    return page.get_text("text")
+
+
+class PageAssets(NamedTuple):
+    thumbnail: bytes  # JPEG
+    text_layer: Dict[str, Any]
+
+
+def _page_assets(page: fitz.Page, width: int, quality: int) -> PageAssets:
+    rect = page.rect
+    zoom = width / rect.width if rect.width else 1.0
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    # word boxes as fractions of the page size, so they overlay a thumbnail of any width
+    words = [
+        [round(x0 / rect.width, 4), round(y0 / rect.height, 4), round(x1 / rect.width, 4), round(y1 / rect.height, 4), w]
+        for x0, y0, x1, y1, w, *_ in page.get_text("words")
+    ]
+    layer = {"width": round(rect.width, 2), "height": round(rect.height, 2), "words": words}
+    return PageAssets(pix.tobytes("jpeg", jpg_quality=quality), layer)
+
+
+def _page_text_and_assets(page: fitz.Page, width: int, quality: int) -> Tuple[str, Optional[PageAssets]]:
+    text = _page_text(page)
+    try:
+        assets: Optional[PageAssets] = _page_assets(page, width, quality)
+    except Exception:
+        # rendering is best-effort: never lose the page text over a thumbnail
+        logger.warning("page_render_failed", extra={"page_number": page.number + 1}, exc_info=True)
+        assets = None
+    return text, assets
+
+
+def _map_range(fn: Callable[..., Any], start: int, end: int, args: Tuple[Any, ...]) -> List[Any]:
+    assert _WORKER_SOURCE is not None
+    doc = _open(_WORKER_SOURCE)
+    try:
+        return [fn(doc[i], *args) for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def page_ranges(n_pages: int, workers: int, min_shard: int = 8) -> List[Tuple[int, int]]:
+    """Split [0, n_pages) into contiguous [start, end) shards.
+
+    Uses ~4 shards per worker so the first pages come back early and stragglers balance out.
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    pages: List[str] = []
+    size = max(min_shard, math.ceil(n_pages / max(1, workers * 4)))
+    return [(s, min(n_pages, s + size)) for s in range(0, n_pages, size)]
+
+
+def _iter_mapped(
+    source: PdfSource, fn: Callable[..., Any], args: Tuple[Any, ...], workers: int, min_pages: int
+) -> Iterator[Tuple[int, Any]]:
+    # fn(page, *args) per page, in page order, serially or over page-range shards
+    doc = _open(source)
     try:
-        for page in doc:
-            text = page.get_text("text")
-            pages.append(text)
+        n_pages = doc.page_count
+        parallel = workers > 1 and n_pages >= min_pages
+        if parallel and multiprocessing.current_process().daemon:
+            # daemonic processes cannot fork children; parse serially
+            logger.warning("pdf_parallel_unavailable_in_daemon")
+            parallel = False
+        if not parallel:
+            for i in range(n_pages):
+                yield i + 1, fn(doc[i], *args)
+            return
     finally:
         doc.close()
-    return pages
+
+    shards = page_ranges(n_pages, workers)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_worker, initargs=(source,)) as pool:
+        futures = [pool.submit(_map_range, fn, start, end, args) for start, end in shards]
+        for (start, _), fut in zip(shards, futures):
+            for offset, result in enumerate(fut.result()):
+                yield start + offset + 1, result
 
 
+def iter_pages(source: PdfSource, workers: int = 1, min_pages: int = 64) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) in page order, 1-based.
+
+    With `workers > 1` and at least `min_pages` pages, page ranges are extracted in a
+    process pool; each worker reopens the document from `source` (pass a path to avoid
+    copying bytes into workers). Pages are yielded as soon as their shard finishes, so
+    consumers can start before the whole document is parsed.
+    """
+    return _iter_mapped(source, _page_text, (), workers, min_pages)
+
+
+def iter_page_assets(
+    source: PdfSource, width: int = 240, quality: int = 70, workers: int = 1, min_pages: int = 64
+) -> Iterator[Tuple[int, PageAssets]]:
+    """Yield (page_number, PageAssets) per page: a `width`-pixel JPEG thumbnail and the
+    page's word boxes (text layer). Sharded across processes like iter_pages.
+    """
+    return _iter_mapped(source, _page_assets, (width, quality), workers, min_pages)
+
+
+def iter_pages_with_assets(
+    source: PdfSource, width: int = 240, quality: int = 70, workers: int = 1, min_pages: int = 64
+) -> Iterator[Tuple[int, str, Optional[PageAssets]]]:
+    """iter_pages and iter_page_assets in one pass: (page_number, text, PageAssets).
+
+    Each page is loaded once for both. Assets are None for a page that failed to render;
+    its text is still returned.
+    """
+    for page_number, (text, assets) in _iter_mapped(source, _page_text_and_assets, (width, quality), workers, min_pages):
+        yield page_number, text, assets
+
+
+def extract_pages_from_pdf_bytes(pdf_bytes: bytes, workers: int = 1, min_pages: int = 64) -> List[str]:
+    """Extract plain text per page from PDF bytes using PyMuPDF.
+
+    Returns a list of page texts in order.
+    """
+    return [text for _, text in iter_pages(pdf_bytes, workers=workers, min_pages=min_pages)]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import struct
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from packages.common.cache import TTLLRUCache
+from packages.common.config import get_settings
+from packages.rag.embeddings import active_provider, l2_normalize
+
+
+logger = logging.getLogger(__name__)
+
+# (unit query vector, cached response payload)
+AnswerEntry = Tuple[np.ndarray, Dict[str, Any]]
+
+
+def scope_key(
+    version_ids: Sequence[int],
+    k: int,
+    history: Sequence[Dict[str, str]] = (),
+    indexed: Optional[Mapping[int, int]] = None,
+) -> str:
+    """Cache namespace for one retrieval scope.
+
+    Built from the exact document versions in scope (latest ones for user scope), so a new
+    upload or re-index changes the key and stale answers are never consulted again. Latest
+    versions are only promoted once fully indexed; versions named explicitly may still be
+    indexing, so pass their searchable state as `indexed` (version id -> embedding count)
+    and the key moves on once they finish. Also keyed by provider/models, `k` and the
+    prior conversation turns.
+    """
+    settings = get_settings()
+    raw = json.dumps(
+        {
+            "versions": sorted(set(version_ids)),
+            "indexed": sorted((indexed or {}).items()),
+            "k": k,
+            "history": [[m["role"], m["content"]] for m in history],
+            "embedding": [active_provider(), settings.embedding_model],
+            "llm": [settings.llm_provider, settings.llm_model],
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _encode(entry: AnswerEntry) -> bytes:
+    vector, payload = entry
+    meta = json.dumps(payload).encode()
+    return struct.pack(">I", len(meta)) + meta + np.asarray(vector, dtype="<f4").tobytes()
+
+
+def _decode(raw: bytes) -> AnswerEntry:
+    (size,) = struct.unpack_from(">I", raw)
+    payload = json.loads(raw[4 : 4 + size])
+    return np.frombuffer(raw, dtype="<f4", offset=4 + size).astype(np.float32), payload
+
+
+@dataclass
+class AnswerCacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+class SemanticAnswerCache:
+    """Answers reused across near-identical questions within the same scope.
+
+    Each scope key holds up to `max_per_scope` (query vector, response) entries; a lookup
+    hits when the cosine distance to a stored query is at most `max_distance`. Entries live
+    in an in-process LRU of scopes and, when configured, in a Redis list per scope.
+    Redis failures degrade to a miss.
+    """
+
+    key_prefix = "ss:ans:"
+
+    def __init__(
+        self,
+        max_distance: float,
+        ttl_seconds: int,
+        max_scopes: int,
+        max_per_scope: int,
+        redis_client: Any = None,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_per_scope = max(1, max_per_scope)
+        self.local: TTLLRUCache[List[AnswerEntry]] = TTLLRUCache(max_scopes, ttl_seconds)
+        self.redis = redis_client
+        self.stats = AnswerCacheStats()
+        self._lock = threading.Lock()
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _match(self, entries: List[AnswerEntry], unit: np.ndarray) -> Optional[Dict[str, Any]]:
+        if not entries:
+            return None
+        sims = np.stack([vec for vec, _ in entries]) @ unit
+        best = int(np.argmax(sims))
+        if 1.0 - float(sims[best]) <= self.max_distance:
+            return entries[best][1]
+        return None
+
+    def _redis_entries(self, scope: str) -> Optional[List[AnswerEntry]]:
+        try:
+            raw = self.redis.lrange(self.key_prefix + scope, 0, self.max_per_scope - 1)
+        except Exception:  # best-effort tier
+            logger.warning("answer_cache_redis_get_failed", exc_info=True)
+            return None
+        return [_decode(item) for item in raw]
+
+    def lookup(self, scope: str, vector: Any) -> Optional[Dict[str, Any]]:
+        """Cached response for a query embedding in `scope`, or None."""
+        if not self.enabled:
+            return None
+        unit = l2_normalize(np.array(vector, dtype=np.float32))
+        hit = self._match(self.local.get(scope) or [], unit)
+        if hit is not None:
+            self._count("local_hits")
+            return hit
+        if self.redis is not None:
+            entries = self._redis_entries(scope)
+            if entries:
+                # other API processes may have answered in this scope; refresh the local tier
+                self.local.set(scope, entries)
+                hit = self._match(entries, unit)
+                if hit is not None:
+                    self._count("redis_hits")
+                    return hit
+        self._count("misses")
+        return None
+
+    def store(self, scope: str, vector: Any, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        entry = (l2_normalize(np.array(vector, dtype=np.float32)), payload)
+        entries = [entry] + (self.local.get(scope) or [])
+        self.local.set(scope, entries[: self.max_per_scope])
+        self._count("stores")
+        if self.redis is not None:
+            key = self.key_prefix + scope
+            try:
+                pipe = self.redis.pipeline()
+                pipe.lpush(key, _encode(entry))
+                pipe.ltrim(key, 0, self.max_per_scope - 1)
+                pipe.expire(key, self.ttl_seconds)
+                pipe.execute()
+            except Exception:
+                logger.warning("answer_cache_redis_set_failed", exc_info=True)
+
+    def stats_dict(self) -> dict:
+        out = self.stats.as_dict()
+        out.update(
+            {
+                "enabled": self.enabled,
+                "max_distance": self.max_distance,
+                "local_scopes": len(self.local),
+                "redis": self.redis is not None,
+            }
+        )
+        return out
+
+
+@lru_cache
+def get_answer_cache() -> SemanticAnswerCache:
+    settings = get_settings()
+    redis_client = None
+    if settings.answer_cache_enabled and settings.answer_cache_redis:
+        from packages.common.redis_client import get_sync_redis
+
+        redis_client = get_sync_redis()
+    return SemanticAnswerCache(
+        max_distance=settings.answer_cache_max_distance,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_scopes=settings.answer_cache_max_scopes,
+        max_per_scope=settings.answer_cache_max_per_scope,
+        redis_client=redis_client,
+        enabled=settings.answer_cache_enabled,
+    )
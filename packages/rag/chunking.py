@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Tuple
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, TypeVar
+
+
+T = TypeVar("T")
 
 
 def split_text_into_chunks(text: str, max_len: int = 800, overlap: int = 100) -> List[Tuple[int, int, str]]:
@@ -23,3 +27,17 @@ def split_text_into_chunks(text: str, max_len: int = 800, overlap: int = 100) ->
     return chunks
 
 
+def iter_page_chunks(
+    pages: Iterable[Tuple[int, str]], max_len: int = 800, overlap: int = 100
+) -> Iterator[Tuple[int, int, int, str]]:
+    """Lazily chunk (page_number, text) pairs into (page_number, start, end, chunk_text)."""
+    for page_number, text in pages:
+        for start, end, chunk in split_text_into_chunks(text, max_len=max_len, overlap=overlap):
+            yield page_number, start, end, chunk
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of up to `size` items from `items` (itertools.batched before 3.12)."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from packages.rag.embeddings import l2_normalize
+
+
+def mmr(
+    candidates: np.ndarray,
+    relevance: Union[Sequence[float], np.ndarray],
+    k: int,
+    lambda_mult: float = 0.7,
+    groups: Optional[Sequence[Hashable]] = None,
+    per_group_cap: Optional[int] = None,
+    duplicate_threshold: Optional[float] = 0.95,
+) -> List[Tuple[int, float]]:
+    """Maximal marginal relevance over candidate vectors.
+
+    Greedily picks the candidate maximizing
+    `lambda_mult * relevance - (1 - lambda_mult) * max cosine to the picks so far`.
+    Candidates whose cosine to a pick reaches `duplicate_threshold` are dropped, and at most
+    `per_group_cap` picks share a group (e.g. a document). Each step is one matrix-vector
+    product, so the cost is O(k * n * dim). Returns (candidate index, mmr score) pairs in
+    selection order.
+    """
+    n = len(candidates)
+    if n == 0 or k <= 0:
+        return []
+    unit = l2_normalize(np.array(candidates, dtype=np.float32))
+    rel = np.asarray(relevance, dtype=np.float32)
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    if groups is not None and per_group_cap is not None:
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        counts = np.zeros(codes.max() + 1, dtype=np.int64)
+    else:
+        codes = None
+
+    picked: List[Tuple[int, float]] = []
+    while len(picked) < k and available.any():
+        scores = lambda_mult * rel - (1.0 - lambda_mult) * max_sim
+        scores[~available] = -np.inf
+        i = int(np.argmax(scores))
+        picked.append((i, float(scores[i])))
+        available[i] = False
+        sims = unit @ unit[i]
+        np.maximum(max_sim, sims, out=max_sim)
+        if duplicate_threshold is not None:
+            available &= sims < duplicate_threshold
+        if codes is not None:
+            counts[codes[i]] += 1
+            if counts[codes[i]] >= per_group_cap:
+                available &= codes != codes[i]
+    return picked
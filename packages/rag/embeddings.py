@@ -1,42 +1,163 @@
 from __future__ import annotations
 
 import hashlib
-from typing import List
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
 from packages.common.config import get_settings
 
 
-def _hash_embed(text: str, dim: int = 1536) -> list[float]:
-    # very cheap deterministic fallback embedding (not for production quality)
-    h = hashlib.sha256(text.encode()).digest()
-    vals = [b / 255.0 for b in h]
-    out: list[float] = []
-    while len(out) < dim:
-        out.extend(vals)
-    return out[:dim]
+logger = logging.getLogger(__name__)
 
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 30.0
 
-def embed_texts(texts: List[str]) -> tuple[str, int, List[List[float]]]:
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows of a float array to unit length in place; all-zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _hash_embed_batch(texts: Sequence[str], dim: int = 1536) -> np.ndarray:
+    # very cheap deterministic fallback embedding (not for production quality):
+    # the sha256 digest bytes tiled to `dim`, one (len(texts), dim) float32 matrix per batch
+    digests = np.frombuffer(b"".join(hashlib.sha256(t.encode()).digest() for t in texts), dtype=np.uint8)
+    digests = digests.reshape(len(texts), hashlib.sha256().digest_size)
+    reps = -(-dim // digests.shape[1])
+    out = np.tile(digests, (1, reps))[:, :dim].astype(np.float32)
+    return l2_normalize(out)
+
+
+def _hash_embed(text: str, dim: int = 1536) -> np.ndarray:
+    return _hash_embed_batch([text], dim)[0]
+
+
+def active_provider() -> str:
+    """Provider that embed_texts will actually use ("openai" needs an API key, else "hash")."""
     settings = get_settings()
-    provider = settings.embedding_provider.lower()
-    model = settings.embedding_model
-    if provider == "openai" and settings.openai_api_key:
-        # Minimal call via OpenAI embeddings API
-        resp = requests.post(
-            "https://api.openai.com/v1/embeddings",
-            headers={"Authorization": f"Bearer {settings.openai_api_key}", "Content-Type": "application/json"},
-            json={"model": model, "input": texts},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        vectors: List[List[float]] = [item["embedding"] for item in data["data"]]
-        dim = len(vectors[0]) if vectors else 0
-        return model, dim, vectors
-    # fallback deterministic embeddings
-    vectors = [_hash_embed(t) for t in texts]
-    return model, len(vectors[0]) if vectors else 0, vectors
+    if settings.embedding_provider.lower() == "openai" and settings.openai_api_key:
+        return "openai"
+    return "hash"
+
+
+def content_hash(text: str) -> str:
+    """Content address of `text` under the active provider/model (embedding cache key)."""
+    settings = get_settings()
+    raw = f"{active_provider()}\0{settings.embedding_model}\0{text}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose; conservative enough for budgeting
+    return len(text) // 4 + 1
+
 
+def plan_batches(texts: Sequence[str], max_items: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split `texts` into contiguous [start, end) slices bounded by item count and token budget.
 
+    A single text above the token budget still gets its own batch (the provider decides).
+    """
+    batches: List[Tuple[int, int]] = []
+    start = 0
+    tokens = 0
+    for i, t in enumerate(texts):
+        cost = estimate_tokens(t)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+@lru_cache
+def _http_session(pool_size: int) -> requests.Session:
+    # keep-alive pool sized to the fan-out so concurrent batches reuse connections
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return min(MAX_BACKOFF_SECONDS, float(retry_after))
+        except ValueError:
+            pass
+    return min(MAX_BACKOFF_SECONDS, 0.5 * (2**attempt)) * (0.5 + random.random() / 2)
+
+
+def _post_embeddings(session: requests.Session, model: str, batch: Sequence[str]) -> np.ndarray:
+    """POST one batch with exponential backoff on 429/5xx and transport errors."""
+    settings = get_settings()
+    attempt = 0
+    while True:
+        last_attempt = attempt >= settings.embedding_max_retries
+        retry_after: Optional[str] = None
+        try:
+            resp = session.post(
+                OPENAI_EMBEDDINGS_URL,
+                headers={"Authorization": f"Bearer {settings.openai_api_key}", "Content-Type": "application/json"},
+                json={"model": model, "input": list(batch)},
+                timeout=settings.embedding_timeout_seconds,
+            )
+            if last_attempt or resp.status_code not in RETRY_STATUSES:
+                resp.raise_for_status()
+                data = resp.json()["data"]
+                # results carry their input index; don't rely on response order
+                return np.array(
+                    [item["embedding"] for item in sorted(data, key=lambda d: d["index"])], dtype=np.float32
+                )
+            retry_after = resp.headers.get("Retry-After")
+            error = f"status {resp.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if last_attempt:
+                raise
+            error = repr(exc)
+        delay = _backoff_delay(attempt, retry_after)
+        logger.warning("embedding_retry", extra={"attempt": attempt + 1, "delay": round(delay, 2), "error": error})
+        time.sleep(delay)
+        attempt += 1
+
+
+def _embed_openai(texts: List[str], model: str) -> np.ndarray:
+    settings = get_settings()
+    batches = plan_batches(texts, settings.embedding_batch_size, settings.embedding_batch_tokens)
+    workers = max(1, min(settings.embedding_concurrency, len(batches)))
+    session = _http_session(settings.embedding_concurrency)
+    if workers == 1:
+        results = [_post_embeddings(session, model, texts[s:e]) for s, e in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+            # map() yields in submission order, so output order matches input order
+            results = list(pool.map(lambda b: _post_embeddings(session, model, texts[b[0] : b[1]]), batches))
+    return np.concatenate(results) if len(results) > 1 else results[0]
+
+
+def embed_texts(texts: List[str]) -> tuple[str, int, np.ndarray]:
+    """Embed `texts` into a (len(texts), dim) float32 matrix, rows in input order."""
+    settings = get_settings()
+    model = settings.embedding_model
+    if not texts:
+        return model, 0, np.zeros((0, 0), dtype=np.float32)
+    if active_provider() == "openai":
+        # Batched, concurrent calls to the OpenAI embeddings API
+        vectors = _embed_openai(texts, model)
+    else:
+        # fallback deterministic embeddings
+        vectors = _hash_embed_batch(texts)
+    return model, vectors.shape[1], vectors
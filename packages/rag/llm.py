@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+
+from packages.common.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+
+Message = Dict[str, str]
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def llm_enabled() -> bool:
+    settings = get_settings()
+    return settings.llm_provider.lower() == "openai" and bool(settings.openai_api_key)
+
+
+def _headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {get_settings().openai_api_key}", "Content-Type": "application/json"}
+
+
+def _payload(messages: Sequence[Message], stream: bool = False) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"model": get_settings().llm_model, "messages": list(messages), "temperature": 0.2}
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def ask_messages(q: str, top_chunks: Sequence[Dict[str, Any]]) -> List[Message]:
+    """Prompt for single-document /qa/ask."""
+    prompt = (
+        "Answer the question concisely using the provided context. Include citations [page].\n\n"
+        f"Question: {q}\n\nContext:\n" + "\n---\n".join([c["text"] for c in top_chunks])
+    )
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def chat_messages(
+    q: str, top_chunks: Sequence[Dict[str, Any]], history: Sequence[Message], course_scoped: bool = False
+) -> List[Message]:
+    """Prompt for /qa/chat: system, short history (last 6 user/assistant turns), question + context."""
+    context = "\n---\n".join([f"[doc: {c['document_title']}]\n{c['text']}" for c in top_chunks])
+    course_hint = ", focusing ONLY on the requested course(s) if specified" if course_scoped else ""
+    prompt_user = (
+        f"Question: {q}\n\nUse the context below and include citations like [page]{course_hint}.\n"
+        f"Do not mix information from different courses unless explicitly asked.\n\nContext:\n{context}"
+    )
+    messages = [{"role": "system", "content": "You are a helpful assistant for course syllabi."}]
+    for m in history[-6:]:
+        if m["role"] in ("user", "assistant"):
+            messages.append({"role": m["role"], "content": m["content"]})
+    messages.append({"role": "user", "content": prompt_user})
+    return messages
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Process-wide async client with keep-alive pooling; created on first use."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        settings = get_settings()
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections, max_keepalive_connections=settings.llm_max_connections
+            ),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def complete(messages: Sequence[Message]) -> Optional[str]:
+    """Chat completion over the shared async client; None if the provider call fails."""
+    try:
+        resp = await get_async_client().post(OPENAI_CHAT_URL, headers=_headers(), json=_payload(messages))
+    except httpx.HTTPError:
+        logger.warning("llm_request_failed", exc_info=True)
+        return None
+    if resp.is_error:
+        logger.warning("llm_request_failed", extra={"status": resp.status_code})
+        return None
+    return resp.json()["choices"][0]["message"]["content"].strip()
+
+
+def parse_sse_delta(line: str) -> Optional[str]:
+    """Content delta from one `data:` line of an OpenAI chat stream ('' for non-content events).
+
+    Returns None at the `[DONE]` sentinel. Malformed payloads are logged and skipped.
+    """
+    if not line.startswith("data:"):
+        return ""
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+        return None
+    try:
+        choices = json.loads(data).get("choices") or [{}]
+        content = choices[0].get("delta", {}).get("content")
+    except (ValueError, AttributeError, LookupError, TypeError):
+        logger.warning("llm_stream_bad_chunk", extra={"chunk": data[:200]})
+        return ""
+    return content if isinstance(content, str) else ""
+
+
+async def stream_completion(messages: Sequence[Message]) -> AsyncIterator[str]:
+    """Yield answer tokens as the provider streams them (raises httpx errors to the caller)."""
+    client = get_async_client()
+    async with client.stream("POST", OPENAI_CHAT_URL, headers=_headers(), json=_payload(messages, stream=True)) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            delta = parse_sse_delta(line)
+            if delta is None:
+                break
+            if delta:
+                yield delta
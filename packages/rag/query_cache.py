@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Tuple
+
+import numpy as np
+
+from packages.common.cache import TTLLRUCache
+from packages.common.config import get_settings
+from packages.rag.embeddings import active_provider, embed_texts
+
+
+logger = logging.getLogger(__name__)
+
+# (model, dim, vector) as returned per text by embed_texts
+QueryEmbedding = Tuple[str, int, np.ndarray]
+
+
+def normalize_query(q: str) -> str:
+    """Case-fold and collapse whitespace so trivially different phrasings share a key."""
+    return " ".join(q.casefold().split())
+
+
+def _encode(value: QueryEmbedding) -> bytes:
+    model, dim, vector = value
+    return f"{model}\n{dim}\n".encode() + np.asarray(vector, dtype="<f4").tobytes()
+
+
+def _decode(raw: bytes) -> QueryEmbedding:
+    model, dim, payload = raw.split(b"\n", 2)
+    return model.decode(), int(dim), np.frombuffer(payload, dtype="<f4").astype(np.float32)
+
+
+def _read_only(value: QueryEmbedding) -> QueryEmbedding:
+    # cached vectors are handed to every caller as-is: writes must fail, not corrupt the entry
+    value[2].setflags(write=False)
+    return value
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+class QueryEmbeddingCache:
+    """Two-tier cache for query embeddings: in-process LRU, then Redis, then provider.
+
+    Keys are sha256(provider, model, normalized query). Redis failures degrade to a miss.
+    Returned vectors are shared with the cache and read-only; copy before modifying.
+    """
+
+    key_prefix = "ss:qemb:"
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: int,
+        redis_client: Any = None,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.local: TTLLRUCache[QueryEmbedding] = TTLLRUCache(maxsize, ttl_seconds)
+        self.redis = redis_client
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def _key(self, q: str) -> str:
+        settings = get_settings()
+        raw = f"{active_provider()}\0{settings.embedding_model}\0{normalize_query(q)}"
+        return self.key_prefix + hashlib.sha256(raw.encode()).hexdigest()
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def embed_query(self, q: str) -> QueryEmbedding:
+        if not self.enabled:
+            model, dim, [v] = embed_texts([q])
+            return model, dim, v
+        key = self._key(q)
+        hit = self.local.get(key)
+        if hit is not None:
+            self._count("local_hits")
+            return hit
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(key)
+            except Exception:  # best-effort tier
+                logger.warning("query_cache_redis_get_failed", exc_info=True)
+                raw = None
+            if raw:
+                value = _read_only(_decode(raw))
+                self.local.set(key, value)
+                self._count("redis_hits")
+                return value
+        self._count("misses")
+        model, dim, [v] = embed_texts([q])
+        value = _read_only((model, dim, v))
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                self.redis.set(key, _encode(value), ex=self.ttl_seconds)
+            except Exception:
+                logger.warning("query_cache_redis_set_failed", exc_info=True)
+        return value
+
+    def stats_dict(self) -> dict:
+        out = self.stats.as_dict()
+        out.update({"enabled": self.enabled, "local_size": len(self.local), "redis": self.redis is not None})
+        return out
+
+
+@lru_cache
+def get_query_cache() -> QueryEmbeddingCache:
+    settings = get_settings()
+    redis_client = None
+    if settings.query_cache_enabled and settings.query_cache_redis:
+        from packages.common.redis_client import get_sync_redis
+
+        redis_client = get_sync_redis()
+    return QueryEmbeddingCache(
+        maxsize=settings.query_cache_max_entries,
+        ttl_seconds=settings.query_cache_ttl_seconds,
+        redis_client=redis_client,
+        enabled=settings.query_cache_enabled,
+    )
+
+
+def embed_query(q: str) -> QueryEmbedding:
+    """Embed a single query through the shared two-tier cache."""
+    return get_query_cache().embed_query(q)
@@ -0,0 +1,8 @@
+from packages.parsers.course_codes import extract_course_codes
+
+
+def test_extract_course_codes_normalizes_titles_and_queries() -> None:
+    assert extract_course_codes("When is the CS 101 midterm?") == ["CS101"]
+    assert extract_course_codes("cs101_syllabus.pdf") == ["CS101"]
+    assert extract_course_codes("MATH-221 / cs 101 / Math 221 notes") == ["MATH221", "CS101"]
+    assert extract_course_codes("STAT1001 week 12") == []
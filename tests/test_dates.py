@@ -0,0 +1,27 @@
+from datetime import datetime
+
+
+def test_date_spans_skip_lines_without_calendar_dates() -> None:
+    from packages.parsers.dates import date_spans
+
+    assert date_spans("Midterm Exam: Thursday, October 12, 2026, in class") == ["Thursday, October 12, 2026"]
+    assert date_spans("HW3 due 9/19 at 11:59pm") == ["9/19 at 11:59pm"]
+    assert date_spans("Exam: 12 Oct 2026 at 2pm") == ["12 Oct 2026 at 2pm"]
+    # keyword lines without a date, dated lines without a keyword, relative weekdays
+    assert date_spans("Grading: final exam 30%, homework due weekly") == []
+    assert date_spans("Week 3 (Sep 15): Recursion") == []
+    assert date_spans("Reading response due Friday") == []
+
+
+def test_extraction_memoizes_and_pool_matches_serial() -> None:
+    from packages.parsers.dates import DateMemo, extract_dated_lines, find_dated_lines
+
+    pages = [
+        (p, "\n".join(["Lab report due Oct. 5, 2026", "Late work is due to illness", f"Quiz {p} due 10/{p}/2026"]))
+        for p in range(1, 9)
+    ]
+    memo = DateMemo()
+    serial = find_dated_lines(pages, memo)
+    assert len(serial) == 16 and memo.misses == 9 and memo.hits == 7
+    assert serial[0].due_at.replace(tzinfo=None) == datetime(2026, 10, 5) and serial[0].page_number == 1
+    assert extract_dated_lines(pages, workers=2, min_pages=1) == serial
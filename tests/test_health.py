@@ -20,3 +20,22 @@ def test_health_live() -> None:
     assert resp.json()["status"] == "ok"
 
 
+
+
+def test_health_pool_reports_checkout_waits() -> None:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+
+    from apps.api.db.pool import TimedQueuePool, pool_status
+    from apps.api.main import app
+
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=2, max_overflow=1)
+    with engine.connect(), engine.connect():
+        busy = pool_status(engine)
+    assert busy is not None
+    assert busy["checked_out"] == 2 and busy["checkouts"] == 2 and busy["max_overflow"] == 1
+    idle = pool_status(engine)
+    assert idle is not None and idle["checked_in"] == 2
+
+    body = TestClient(app).get("/health/pool").json()
+    assert body["role"] == "api" and body["sync"]["size"] == 10
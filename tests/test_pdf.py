@@ -0,0 +1,63 @@
+import fitz
+
+
+def _make_pdf(n_pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(n_pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1}\nWeek {i + 1}: reading and homework due")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_page_ranges_cover_document() -> None:
+    from packages.parsers.pdf import page_ranges
+
+    shards = page_ranges(250, workers=4)
+    assert shards[0][0] == 0 and shards[-1][1] == 250
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+
+
+def test_parallel_extraction_matches_serial(tmp_path) -> None:
+    from packages.parsers.pdf import extract_pages_from_pdf_bytes, iter_pages
+
+    data = _make_pdf(24)
+    serial = extract_pages_from_pdf_bytes(data)
+    assert len(serial) == 24 and "Page 24" in serial[-1]
+    assert extract_pages_from_pdf_bytes(data, workers=2, min_pages=1) == serial
+
+    path = tmp_path / "syllabus.pdf"
+    path.write_bytes(data)
+    assert list(iter_pages(path, workers=3, min_pages=1)) == list(enumerate(serial, start=1))
+
+
+def test_page_assets_are_small_thumbnails_with_word_boxes(tmp_path) -> None:
+    from packages.parsers.pdf import iter_page_assets
+
+    path = tmp_path / "syllabus.pdf"
+    path.write_bytes(_make_pdf(3))
+    assets = list(iter_page_assets(path, width=120, workers=2, min_pages=1))
+    assert [n for n, _ in assets] == [1, 2, 3]
+    thumb = fitz.Pixmap(assets[0][1].thumbnail)
+    assert thumb.width == 120 and len(assets[0][1].thumbnail) < 20_000
+    words = assets[2][1].text_layer["words"]
+    assert ["Page", "3"] == [w[4] for w in words[:2]] and all(0 <= v <= 1 for w in words for v in w[:4])
+
+
+def test_text_and_assets_in_one_pass(tmp_path, monkeypatch) -> None:
+    from packages.parsers import pdf
+
+    path = tmp_path / "syllabus.pdf"
+    path.write_bytes(_make_pdf(3))
+    combined = list(pdf.iter_pages_with_assets(path, width=120, workers=2, min_pages=1))
+    assert [(n, text) for n, text, _ in combined] == list(pdf.iter_pages(path))
+    assert all(assets is not None and fitz.Pixmap(assets.thumbnail).width == 120 for _, _, assets in combined)
+
+    def broken(page, width, quality):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(pdf, "_page_assets", broken)
+    serial = list(pdf.iter_pages_with_assets(path))
+    assert [(n, text) for n, text, _ in serial] == list(pdf.iter_pages(path))
+    assert all(assets is None for _, _, assets in serial)